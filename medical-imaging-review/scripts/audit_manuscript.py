@@ -82,6 +82,78 @@ SYSTEMATIC_SUPPORT_TERMS = [
 ]
 
 
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Regex for a set of literal terms, factored into a trie ("Ca(?:Ri\\-(?:Heart|Plaque)|risto)").
+
+    The regex engine tries alternatives one by one, so a flat "t1|t2|...|tN" costs N attempts at
+    every position; the trie form branches on one character at a time. Longer terms are tried
+    first (an optional tail is greedy).
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            return f"(?:{body})?" if len(alts) == 1 and len(body) > 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+class TermMatcher:
+    """All occurrences of many literal terms in one regex pass, reporting which terms matched.
+
+    Compiled once per run. `lowercase=True` matches terms against the lowercased text (a
+    case-insensitive substring test); `word_boundary=True` requires a regex word boundary on
+    both sides of the term. `find` reports exactly the terms that the per-term tests
+    (`term in text.lower()` / `re.search(rf"\\b{re.escape(term)}\\b", text)`) would report,
+    including terms that overlap or nest inside other matches.
+    """
+
+    _BOUNDARY = re.compile(r"\b")
+
+    def __init__(self, terms: Iterable[str], *, lowercase: bool = False, word_boundary: bool = False):
+        self.terms = list(dict.fromkeys(terms))
+        self.lowercase = lowercase
+        self.word_boundary = word_boundary
+        self._by_key: dict[str, list[str]] = defaultdict(list)
+        for term in self.terms:
+            self._by_key[term.lower() if lowercase else term].append(term)
+        keys = list(self._by_key)
+        # Terms matching at one position are prefixes of each other: the regex reports the
+        # longest, the shorter ones are re-checked from there.
+        self._prefixes = {k: [o for o in keys if o != k and k.startswith(o)] for k in keys}
+        edge = r"\b" if word_boundary else ""
+        self._pattern = re.compile(f"(?=({edge}{_trie_pattern(keys)}{edge}))") if keys else None
+
+    def find(self, text: str) -> list[str]:
+        """The terms occurring in `text`, in the order they were given."""
+        if self._pattern is None:
+            return []
+        if self.lowercase:
+            text = text.lower()
+        found: set[str] = set()
+        for match in self._pattern.finditer(text):
+            key = match.group(1)
+            found.add(key)
+            for shorter in self._prefixes[key]:
+                if not self.word_boundary or self._BOUNDARY.match(text, match.start() + len(shorter)):
+                    found.add(shorter)
+        return [term for term in self.terms if (term.lower() if self.lowercase else term) in found]
+
+
+PLACEHOLDER_RE = re.compile("|".join(f"(?:{p})" for p in PLACEHOLDER_PATTERNS), flags=re.I)
+LLM_TELL_MATCHER = TermMatcher(LLM_TELLS, lowercase=True)
+
+
 @dataclass
 class Finding:
     severity: str
@@ -241,10 +313,10 @@ def first_author_from_ref(entry: str) -> str | None:
 
 
 def scan_placeholders(lines: list[str]) -> Iterable[Finding]:
-    pattern = re.compile("|".join(f"(?:{p})" for p in PLACEHOLDER_PATTERNS), flags=re.I)
     for idx, line in enumerate(lines, start=1):
-        if pattern.search(line):
-            yield Finding("critical", "placeholder", idx, "Placeholder or unfinished string found.", line_excerpt(line))
+        match = PLACEHOLDER_RE.search(line)
+        if match:
+            yield Finding("critical", "placeholder", idx, f"Placeholder or unfinished string found: {match.group(0)}", line_excerpt(line))
 
 
 def scan_headings(lines: list[str]) -> Iterable[Finding]:
@@ -256,21 +328,21 @@ def scan_headings(lines: list[str]) -> Iterable[Finding]:
             yield Finding("medium", "h4_heading", idx, "H4 heading found; use bold lead-ins in narrative body sections.", line_excerpt(line))
 
 
-def scan_llm_tells(lines: list[str]) -> Iterable[Finding]:
+def scan_llm_tells(lines: list[str], matcher: TermMatcher = LLM_TELL_MATCHER) -> Iterable[Finding]:
     for idx, line in enumerate(lines, start=1):
-        lower = line.lower()
-        for tell in LLM_TELLS:
-            if tell in lower:
-                yield Finding("low", "llm_tell", idx, f"LLM-tell phrase found: {tell}", line_excerpt(line))
+        for tell in matcher.find(line):
+            yield Finding("low", "llm_tell", idx, f"LLM-tell phrase found: {tell}", line_excerpt(line))
 
 
-def scan_vendor_mentions(body_lines: list[str], vendors: list[str]) -> Iterable[Finding]:
+def scan_vendor_mentions(body_lines: list[str], vendors: list[str] | TermMatcher) -> Iterable[Finding]:
+    # One matcher over every vendor name, so a several-hundred-product list costs one regex
+    # pass per line instead of one search per line and vendor.
+    matcher = vendors if isinstance(vendors, TermMatcher) else TermMatcher(vendors, word_boundary=True)
     for idx, line in enumerate(body_lines, start=1):
         if is_table_line(line):
             continue
-        for vendor in vendors:
-            if re.search(rf"\b{re.escape(vendor)}\b", line):
-                yield Finding("high", "vendor_body_mention", idx, f"Vendor/product name in body: {vendor}. Justify or rewrite.", line_excerpt(line))
+        for vendor in matcher.find(line):
+            yield Finding("high", "vendor_body_mention", idx, f"Vendor/product name in body: {vendor}. Justify or rewrite.", line_excerpt(line))
 
 
 def scan_equations(lines: list[str]) -> Iterable[Finding]:
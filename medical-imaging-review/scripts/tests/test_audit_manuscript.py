@@ -201,6 +201,49 @@ def test_missing_input_returns_nonzero_without_traceback():
     assert "error:" in proc.stderr.lower()
 
 
+# --------------------------------------------------------------------------------------
+# Term scanners: one precompiled matcher per run, reporting the matched term.
+# --------------------------------------------------------------------------------------
+
+def test_term_scanners_report_matched_terms():
+    payload = run(
+        "## Body\n\nInterestingly, the CaRi-Heart tool has shown promising results.\n"
+        "HeartFlow and Cleerly were compared; DeepVesselX is not a vendor name.\n\n"
+        "| Vendor | Product |\n| Keya | Shukun |\n\nDOI to be added.\n"
+    )
+    messages = [f["message"] for f in payload["findings"]]
+    vendors = [m for m in messages if m.startswith("Vendor/product")]
+    assert vendors == [f"Vendor/product name in body: {v}. Justify or rewrite."
+                       for v in ("CaRi-Heart", "HeartFlow", "Cleerly")], vendors
+    assert "LLM-tell phrase found: has shown promising" in messages
+    assert "LLM-tell phrase found: interestingly," in messages
+    assert "Placeholder or unfinished string found: to be added" in messages
+
+
+def test_term_matcher_equals_per_term_search():
+    import random
+    import re
+
+    sys.path.insert(0, str(SCRIPT.parent))
+    from audit_manuscript import TermMatcher
+
+    rng = random.Random(0)
+
+    def word() -> str:
+        return "".join(rng.choice("abcAB-") for _ in range(rng.randint(1, 5)))
+
+    for _ in range(200):
+        terms = [word() for _ in range(rng.randint(1, 25))]
+        terms += [t[: rng.randint(0, len(t))] + word() for t in terms[:5]]  # shared prefixes
+        bounded = TermMatcher(terms, word_boundary=True)
+        lowered = TermMatcher(terms, lowercase=True)
+        unique = list(dict.fromkeys(terms))
+        for _ in range(20):
+            line = " ".join(rng.choice(terms + [word(), word()]) for _ in range(rng.randint(0, 8)))
+            assert bounded.find(line) == [t for t in unique if re.search(rf"\b{re.escape(t)}\b", line)]
+            assert lowered.find(line) == [t for t in unique if t.lower() in line.lower()]
+
+
 # --------------------------------------------------------------------------------------
 # Direct-run harness (no pytest required).
 # --------------------------------------------------------------------------------------
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Persistent citation cache for `fetch_bib.resolve` (SQLite).
+
+A deck's bibliography is resolved again on every run, and the same references recur across
+decks; without a cache each one is an arXiv / Crossref round-trip every time. Rows are keyed
+by `fetch_bib.cache_key` — the normalized `classify_query` result — so `arXiv:1706.03762v5`
+and `1706.03762` share one row. The parsed entry dict is stored as JSON with its fetch time:
+
+  * resolved entries live for `ttl` seconds (default 30 days);
+  * "not found" results ({resolved: False} without an error) live for the shorter
+    `negative_ttl` (default 1 day), so a paper that appears on Crossref tomorrow is retried;
+  * network / parse errors are never cached.
+
+The database runs in WAL mode with a busy timeout and every write is one autocommitted
+statement, so several processes (e.g. a batch of decks) can share one cache file.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join("~", ".cache", "scholar-slides", "bib.sqlite3")
+DEFAULT_TTL = 30 * 86400
+DEFAULT_NEGATIVE_TTL = 86400
+
+
+class BibCache:
+    """An SQLite file of resolved citation entries with positive/negative TTLs."""
+
+    def __init__(self, path=DEFAULT_PATH, ttl: float = DEFAULT_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        self.path = os.path.expanduser(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (kind TEXT NOT NULL, value TEXT NOT NULL, "
+            "entry TEXT NOT NULL, resolved INTEGER NOT NULL, fetched_at REAL NOT NULL, "
+            "PRIMARY KEY (kind, value))")
+
+    def get(self, kind, value, now=None):
+        """The cached entry under (kind, value), or None if absent or expired."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT entry, resolved, fetched_at FROM entries WHERE kind = ? AND value = ?",
+                (kind, value)).fetchone()
+            if row is not None:
+                entry, resolved, fetched_at = row
+                if now - fetched_at < (self.ttl if resolved else self.negative_ttl):
+                    self.hits += 1
+                    return json.loads(entry)
+            self.misses += 1
+        return None
+
+    def put(self, kind, value, entry, now=None):
+        """Store a resolve() result. Results carrying an `error` are not cached."""
+        if entry.get("error"):
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (kind, value, entry, resolved, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, value, json.dumps(entry, ensure_ascii=False),
+                 1 if entry.get("resolved") else 0, now if now is not None else time.time()))
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Content-addressed cache for rendered figure crops.
+
+Iterating on a deck re-runs Stage 1 many times against the same PDF; re-rasterizing every
+crop each time is wasted work. A crop is fully determined by the PDF's bytes, the page, the
+clip rect, the DPI and the image format, so that tuple (with the clip rounded to 1/100 pt)
+is hashed into a key. A hit is a hardlink (or copy, across filesystems) of the cached file
+into place — no rasterization — and a stored crop is linked into the cache the same way, so
+a bundle's crops and its cache share their bytes. The cache is size-capped with LRU eviction: a hit refreshes
+the entry's mtime, and eviction drops the least recently used entries first.
+
+Entries are written to a temp name and `os.replace`d into place, so concurrent runs sharing
+one cache dir never see a torn file. `cache_key` / `file_sha256` are pure/unit-tested.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def file_sha256(path, chunk: int = 1 << 20) -> str:
+    """Hex SHA-256 of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def cache_key(pdf_hash: str, page: int, clip, dpi: int, fmt: str = "png") -> str:
+    """Key for one crop: PDF content hash + page + clip rounded to 0.01 pt + DPI + format."""
+    payload = json.dumps([pdf_hash, int(page), [round(float(v), 2) for v in clip], int(dpi),
+                          fmt.lower()])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def place(src, dest):
+    """Put `src`'s bytes at `dest` as a fresh file: hardlink when possible, else copy.
+
+    `dest` is unlinked first, so a later write to `dest` can never truncate a cache entry it
+    used to share an inode with.
+    """
+    if os.path.lexists(dest):
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+class CropCache:
+    """A directory of `<key[:2]>/<key>.<fmt>` crop files, capped at `max_bytes` (LRU)."""
+
+    def __init__(self, root, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key, fmt="png"):
+        return os.path.join(self.root, key[:2], f"{key}.{fmt}")
+
+    def fetch(self, key, dest, fmt="png") -> bool:
+        """Materialize the cached crop for `key` at `dest`. Returns False on a miss."""
+        path = self._path(key, fmt)
+        try:
+            os.utime(path)            # LRU clock: a hit makes the entry most recent
+            place(path, dest)
+        except FileNotFoundError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, key, src, fmt="png"):
+        """Enter a freshly rendered crop at `src` into the cache under `key`.
+
+        Like `place`, the entry is a hardlink to `src` when possible (so the bundle's crop and
+        its cache entry share one copy on disk), else a copy.
+        """
+        path = self._path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            os.remove(tmp)
+            try:
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits `max_bytes`."""
+        entries = []
+        total = 0
+        for dirpath, _dirs, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                p = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(p)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+        entries.sort()
+        for _mtime, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(p)
+            except FileNotFoundError:
+                pass
+            total -= size
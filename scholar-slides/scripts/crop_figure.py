@@ -50,25 +50,27 @@ def panel_bbox(figure_record, label):
     return None
 
 
-def crop(pdf_path, page_number, rect, out_path, dpi: int = 200,
+def crop(pdf, page_number, rect, out_path, dpi: int = 200,
          page_rect=None, pad_abs: float = 4.0, pad_frac: float = 0.02):
-    """Render `rect` on 1-indexed `page_number` to a PNG at `out_path`. Returns out_path."""
+    """Render `rect` on 1-indexed `page_number` to a PNG at `out_path`. Returns out_path.
+
+    `pdf` is a path or an already-open `fitz.Document` (shared, left open).
+    """
     import fitz
 
-    doc = fitz.open(pdf_path)
-    try:
+    import page_pool
+
+    with page_pool.open_doc(pdf) as doc:
         page = doc[page_number - 1]
         pr = page_rect or (page.rect.x0, page.rect.y0, page.rect.x1, page.rect.y1)
         clip = pad_and_clamp(rect, pr, pad_abs=pad_abs, pad_frac=pad_frac)
         zoom = dpi / 72.0
         pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=fitz.Rect(*clip))
         pix.save(out_path)
-    finally:
-        doc.close()
     return out_path
 
 
-def crop_panel(pdf_path, figure_record, label, out_path, dpi: int = 300):
+def crop_panel(pdf, figure_record, label, out_path, dpi: int = 300):
     """Crop one sub-panel of a multi-panel figure to a legible standalone PNG.
 
     Panels are cropped tight (no fractional expansion) so the crop does not bleed into the
@@ -78,24 +80,76 @@ def crop_panel(pdf_path, figure_record, label, out_path, dpi: int = 300):
     bbox = panel_bbox(figure_record, label)
     if bbox is None:
         raise ValueError(f"{figure_record.get('id')}: no panel '{label}'")
-    return crop(pdf_path, figure_record["page"], bbox, out_path, dpi=dpi,
+    return crop(pdf, figure_record["page"], bbox, out_path, dpi=dpi,
                 pad_abs=1.0, pad_frac=0.0)
 
 
-def crop_from_inventory(pdf_path, figures, out_dir, dpi: int = 300):
+def crop_jobs(doc, jobs):
+    """Render a batch of crops page-grouped: ONE rasterization per (page, dpi), then slicing.
+
+    `jobs` = [(page_number, clip, dpi, out_path)] with `clip` already padded/clamped (page
+    points, 1-indexed page). Jobs sharing a page and DPI are rendered once over the union of
+    their clips and each PNG is cut from that pixmap. The device pixel grid is the same as a
+    per-clip `get_pixmap(clip=...)`, so text and vector content come out pixel-identical
+    (embedded rasters can differ by MuPDF's clip-dependent resampling phase — invisible at
+    crop DPI). A 6-panel figure plus its full crop costs one rasterization instead of seven.
+    An existing file at an output path is unlinked first: it may be a hardlink shared with a
+    crop cache entry, which must never be written through.
+    """
+    import os
+
+    import fitz
+
+    groups: dict = {}
+    for k, (pno, _clip, dpi, _out) in enumerate(jobs):
+        groups.setdefault((pno, dpi), []).append(k)
+    for (pno, dpi), ks in groups.items():
+        page = doc[pno - 1]
+        zoom = dpi / 72.0
+        mat = fitz.Matrix(zoom, zoom)
+        rects = [fitz.Rect(*jobs[k][1]) for k in ks]
+        union = fitz.Rect(rects[0])
+        for r in rects[1:]:
+            union.include_rect(r)
+        sheet = page.get_pixmap(matrix=mat, clip=union)
+        for k, r in zip(ks, rects):
+            irect = (r * mat).irect
+            pix = fitz.Pixmap(sheet.colorspace, irect, sheet.alpha)
+            pix.copy(sheet, irect)
+            if os.path.lexists(jobs[k][3]):
+                os.remove(jobs[k][3])
+            pix.save(jobs[k][3])
+    return [j[3] for j in jobs]
+
+
+def crop_from_inventory(pdf, figures, out_dir, dpi: int = 300,
+                        panels: bool = False, panel_dpi: int = 300, workers: int = 1,
+                        cache=None, pdf_hash=None):
     """Crop every localized figure in a figures.json list. Returns list of results.
 
     Uses `figure_clip` (caption-safe padding); 300 dpi default so a crop displayed at the
-    layout's protagonist height (~560-640 px) stays crisp on a projector.
+    layout's protagonist height (~560-640 px) stays crisp on a projector. With `panels`, each
+    detected sub-panel is also cropped (as `crop_panel` would) to `<id>-<label>.png`. All
+    crops go through `crop_jobs` on one open document: each page is rasterized once per DPI.
+    `pdf` is a path or an already-open `fitz.Document` (shared, left open). workers > 1 hands
+    the per-page job batches to that many processes (see `page_pool.map_doc_batches`), each
+    with its own document handle; rendering and PNG encoding happen in the workers. Results
+    are in inventory order either way.
+
+    `cache` (a `crop_cache.CropCache`) short-circuits crops already rendered from the same
+    PDF bytes, page, clip and DPI: they are linked/copied into place instead of rasterized.
+    The PDF is hashed for the cache key unless the caller passes that SHA-256 as `pdf_hash`
+    (prepare already has it). Hashing and workers > 1 need a file-backed document
+    (`page_pool.doc_path`).
     """
     import os
 
-    import fitz
+    import page_pool
 
     os.makedirs(out_dir, exist_ok=True)
     results = []
-    doc = fitz.open(pdf_path)
-    try:
+    jobs = []
+    with page_pool.open_doc(pdf) as doc:
         for f in figures:
             bbox = f.get("figure_bbox")
             if not bbox:
@@ -103,15 +157,54 @@ def crop_from_inventory(pdf_path, figures, out_dir, dpi: int = 300):
                 continue
             page = doc[f["page"] - 1]
             pr = (page.rect.x0, page.rect.y0, page.rect.x1, page.rect.y1)
-            clip = figure_clip(f, pr)
             out = os.path.join(out_dir, f"{f['id']}.png")
-            crop(pdf_path, f["page"], clip, out, dpi=dpi, pad_abs=0.0, pad_frac=0.0)
+            jobs.append((f["page"], figure_clip(f, pr), dpi, out))
             results.append({"id": f["id"], "status": "ok", "path": out})
-    finally:
-        doc.close()
+            if not panels:
+                continue
+            for p in f.get("panels") or []:
+                out = os.path.join(out_dir, f"{f['id']}-{p['label']}.png")
+                clip = pad_and_clamp(p["bbox"], pr, pad_abs=1.0, pad_frac=0.0)
+                jobs.append((f["page"], clip, panel_dpi, out))
+                results.append({"id": f"{f['id']}-{p['label']}", "status": "ok", "path": out})
+        keys = []
+        if cache is not None:
+            if pdf_hash is None:
+                import crop_cache
+
+                pdf_hash = crop_cache.file_sha256(page_pool.doc_path(doc, "the crop cache"))
+            jobs, keys = _fetch_cached(pdf_hash, jobs, cache)
+        by_page: dict = {}
+        for j in jobs:
+            by_page.setdefault(j[0], []).append(j)
+        if workers > 1 and len(by_page) > 1:
+            page_pool.map_doc_batches(crop_jobs, page_pool.doc_path(doc, "workers > 1"),
+                                      list(by_page.values()), workers)
+        else:
+            crop_jobs(doc, jobs)
+    if cache is not None:
+        for key, (_pno, _clip, _dpi, out) in zip(keys, jobs):
+            cache.store(key, out)
+        cache.evict()
     return results
 
 
+def _fetch_cached(pdf_hash, jobs, cache):
+    """Serve cache hits in place; return (jobs still to render, their cache keys)."""
+    import os
+
+    import crop_cache
+
+    misses, keys = [], []
+    for j in jobs:
+        pno, clip, dpi, out = j
+        key = crop_cache.cache_key(pdf_hash, pno, clip, dpi, os.path.splitext(out)[1][1:] or "png")
+        if not cache.fetch(key, out):
+            misses.append(j)
+            keys.append(key)
+    return misses, keys
+
+
 def main(argv):
     import argparse
 
@@ -120,16 +213,34 @@ def main(argv):
     ap.add_argument("figures_json", help="figures.json from detect_figures.py")
     ap.add_argument("--out-dir", default="out/figures")
     ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--panels", action="store_true", help="also crop each detected sub-panel")
+    ap.add_argument("--workers", type=int, default=1, help="parallel render worker processes")
+    ap.add_argument("--cache-dir", help="reuse crops from this content-addressed crop cache")
+    ap.add_argument("--profile", action="store_true",
+                    help="print wall/CPU time and process peak RSS to stderr")
     args = ap.parse_args(argv)
 
     with open(args.figures_json, encoding="utf-8") as fh:
         figures = json.load(fh)
-    res = crop_from_inventory(args.pdf, figures, args.out_dir, dpi=args.dpi)
+    cache = None
+    if args.cache_dir:
+        import crop_cache
+
+        cache = crop_cache.CropCache(args.cache_dir)
+    import profiling
+
+    profile = {}
+    with profiling.measure(profile, "crop"):
+        res = crop_from_inventory(args.pdf, figures, args.out_dir, dpi=args.dpi,
+                                  panels=args.panels, workers=args.workers, cache=cache)
     ok = sum(1 for r in res if r["status"] == "ok")
-    print(f"cropped {ok}/{len(res)} figures -> {args.out_dir}")
+    print(f"cropped {ok}/{len(res)} figures -> {args.out_dir}"
+          + (f" (cache: {cache.hits} hit, {cache.misses} rendered)" if cache else ""))
     for r in res:
         if r["status"] != "ok":
             print(f"  [skip] {r['id']}: {r['status']}")
+    if args.profile:
+        profiling.print_profile(profile)
 
 
 if __name__ == "__main__":
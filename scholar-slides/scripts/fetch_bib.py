@@ -7,15 +7,41 @@ script, which resolves a citation against arXiv / DOI / Crossref over HTTP and r
 verified entry — so a reference is grounded in a real record, never written from memory.
 An unresolved query yields {resolved: false} and the caller emits `[UNVERIFIED]`.
 
+With `--library` (a BibTeX / CSL-JSON export or Zotero's `zotero.sqlite`), the user's own
+library is tier 0: `local_bib` answers from an on-disk index before the cache or the network.
+Resolved (and not-found) results are kept in a persistent SQLite cache (`bib_cache`) keyed by
+`cache_key`, so re-running a deck costs no round-trips; `--offline` resolves from the cache
+alone and `--refresh` re-fetches everything. `resolve_all` resolves a bibliography on a thread
+pool; every request to arXiv / Crossref goes through that service's `RateLimit`, so the pool
+never exceeds the service's polite-access limits, and over the shared keep-alive session
+(`http_session`), which retries 429/5xx with backoff.
+
+A title search fetches the top CROSSREF_ROWS Crossref hits in one request and takes the best
+one that verifies (`rank_candidates`: `title_match`, then year / author agreement with the
+query's optional hints), instead of giving up when the top hit is wrong.
+
+For long bibliographies (systematic reviews), `--ndjson` reads one query per line and
+`--ndjson-out` appends each result as a JSON line the moment it resolves; `--resume` skips the
+queries that file already answers, so an interrupted run picks up where it stopped.
+
 Pure parsers (`parse_crossref_message`, `parse_arxiv_atom`, `make_key`, `format_reference`,
-`classify_query`) are unit-tested; the `fetch_*` / `resolve*` functions do the HTTP.
+`classify_query`, `cache_key`, `match_titles`, `rank_candidates`) are unit-tested; the
+`fetch_*` / `resolve*` functions do the HTTP.
 """
 from __future__ import annotations
 
 import json
+import os
 import re
 import sys
+import threading
+import time
 import xml.etree.ElementTree as ET
+from collections import Counter
+from contextlib import contextmanager
+
+import bib_cache
+import http_session
 
 _ARXIV_ID = re.compile(r"^(?:arxiv:)?(\d{4}\.\d{4,5})(?:v\d+)?$", re.IGNORECASE)
 _DOI = re.compile(r"^(?:doi:)?(10\.\d{4,9}/\S+)$", re.IGNORECASE)
@@ -33,10 +59,56 @@ def classify_query(q):
     return ("title", q)
 
 
-def _norm_title(s):
+def split_query(q):
+    """A query string, or a dict {"title"|"query": ..., "year": ..., "authors"|"author": ...}
+    -> (query string, hints for `fetch_crossref_by_title`)."""
+    if not isinstance(q, dict):
+        return q, {}
+    hints = {"year": q.get("year"), "authors": q.get("authors") or q.get("author")}
+    return q.get("title") or q.get("query") or "", {k: v for k, v in hints.items() if v}
+
+
+def norm_title(s):
+    """Lowercased title with every run of non-alphanumerics collapsed to one space."""
     return re.sub(r"[^a-z0-9]+", " ", (s or "").lower()).strip()
 
 
+def cache_key(kind, value, hints=None):
+    """Cache key for a `classify_query` result: DOIs lowercased, titles `norm_title`d.
+
+    A title's `split_query` hints re-rank its Crossref candidates, so they are part of the
+    key: `Attention...` with year 2017 and the bare title may cache different entries.
+    """
+    if kind == "doi":
+        return kind, value.lower()
+    if kind == "title":
+        return kind, norm_title(value) + _hints_key(hints)
+    return kind, value
+
+
+def _hints_key(hints):
+    """Canonical ` | year=... authors=...` suffix for title hints ("" without any)."""
+    if not hints:
+        return ""
+    parts = []
+    year = _year_of(hints.get("year"))
+    if year is not None:
+        parts.append(f"year={year}")
+    authors = hints.get("authors")
+    if isinstance(authors, str):
+        authors = [authors]
+    families = sorted({_family(a) for a in authors or ()} - {""})
+    if families:
+        parts.append("authors=" + ",".join(families))
+    return " | " + " ".join(parts) if parts else ""
+
+
+def _year_of(value):
+    """The four-digit year in `value` ("2017", 2017, "2017a", "c. 2017"), or None ("n.d.")."""
+    m = re.search(r"(?<!\d)\d{4}(?!\d)", str(value or ""))
+    return int(m.group()) if m else None
+
+
 def title_match(query, result, threshold=0.95):
     """Order-sensitive title verification, to guard against Crossref returning a
     confidently-wrong top hit (which would fabricate a citation). Accepts only: an exact
@@ -45,7 +117,7 @@ def title_match(query, result, threshold=0.95):
     'Is Attention All You Need?' vs 'Attention Is All You Need'."""
     import difflib
 
-    a, b = _norm_title(query), _norm_title(result)
+    a, b = norm_title(query), norm_title(result)
     if not a or not b:
         return False
     if a == b:
@@ -56,6 +128,55 @@ def title_match(query, result, threshold=0.95):
     return difflib.SequenceMatcher(None, a, b).ratio() >= threshold
 
 
+def _trigram_counts(norm):
+    return Counter(norm[i:i + 3] for i in range(len(norm) - 2))
+
+
+def match_titles(query, candidates, threshold=0.95):
+    """Indices of the `candidates` that `title_match(query, candidate)` accepts, in order.
+
+    Same accept/reject decisions as calling `title_match` on each, but the SequenceMatcher
+    ratio is computed only for candidates that can still reach `threshold`:
+
+      * length bound — the ratio 2M/(la+lb) is at most 2*min(la, lb)/(la+lb);
+      * trigram bound — every trigram inside a matching block is shared, and each unmatched
+        character (or block boundary) spoils at most 3 (or 2) of them, so the S trigrams two
+        titles share cap the matched characters at M <= (S + 2*(la+lb) + 2) / 5.
+
+    Both bounds are exact upper bounds, so rejecting on them never changes a decision.
+    """
+    return list(iter_title_matches(query, candidates, threshold))
+
+
+def iter_title_matches(query, candidates, threshold=0.95):
+    """`match_titles` as a generator over any iterable: a caller that only wants the first
+    accepted candidate stops there, without normalizing or scoring the rest."""
+    import difflib
+
+    a = norm_title(query)
+    if not a:
+        return
+    la, ta = len(a), None
+    for i, cand in enumerate(candidates):
+        b = norm_title(cand)
+        if not b:
+            continue
+        short, long = sorted((a, b), key=len)
+        if a == b or (len(short) >= 15 and long.startswith(short)):
+            yield i
+            continue
+        lb = len(b)
+        if 2.0 * min(la, lb) / (la + lb) < threshold:
+            continue
+        if ta is None:
+            ta = _trigram_counts(a)
+        shared = sum((ta & _trigram_counts(b)).values())
+        if 2.0 * ((shared + 2 * (la + lb) + 2) // 5) / (la + lb) < threshold:
+            continue
+        if difflib.SequenceMatcher(None, a, b).ratio() >= threshold:
+            yield i
+
+
 def make_key(authors, year):
     """A BibTeX-ish key: first author's family name (lowercased, ascii word) + year."""
     fam = ""
@@ -81,7 +202,8 @@ def format_reference(e):
     return " ".join(p for p in parts if p).strip()
 
 
-def _entry(title, authors, year, venue, doi, arxiv, source, etype="article"):
+def make_entry(title, authors, year, venue, doi, arxiv, source, etype="article"):
+    """A resolved entry in the shape every tier returns (network parsers, `local_bib`)."""
     e = {
         "key": make_key(authors, year),
         "title": title,
@@ -110,102 +232,545 @@ def parse_crossref_message(msg):
             break
     venue = (msg.get("container-title") or [None])[0]
     etype = "inproceedings" if (msg.get("type") or "").startswith("proceedings") else "article"
-    return _entry(title, authors, year, venue, msg.get("DOI"), None, "crossref", etype)
+    return make_entry(title, authors, year, venue, msg.get("DOI"), None, "crossref", etype)
 
 
-def parse_arxiv_atom(xml_text):
-    """arXiv Atom API response -> entry (first entry), or None if no entry."""
-    ns = {"a": "http://www.w3.org/2005/Atom", "arxiv": "http://arxiv.org/schemas/atom"}
-    root = ET.fromstring(xml_text)
-    e = root.find("a:entry", ns)
-    if e is None:
-        return None
+_ATOM_NS = {"a": "http://www.w3.org/2005/Atom", "arxiv": "http://arxiv.org/schemas/atom"}
+
+
+def _parse_arxiv_entry(e):
+    ns = _ATOM_NS
     title = " ".join((e.findtext("a:title", "", ns) or "").split())
     authors = [" ".join((n.text or "").split()) for n in e.findall("a:author/a:name", ns)]
     published = e.findtext("a:published", "", ns) or ""
     year = published[:4] or None
     id_url = e.findtext("a:id", "", ns) or ""
-    arxiv = id_url.split("/abs/")[-1].split("v")[0] if "/abs/" in id_url else None
+    arxiv = id_url.split("/abs/")[-1].split("v")[0]
     doi = e.findtext("arxiv:doi", None, ns)
     venue = e.findtext("arxiv:journal_ref", None, ns) or "arXiv preprint"
-    return _entry(title, authors, year, venue, doi, arxiv, "arxiv")
+    return make_entry(title, authors, year, venue, doi, arxiv, "arxiv")
+
+
+def parse_arxiv_feed(xml_text):
+    """arXiv Atom API response -> one entry per paper <entry>, in feed order.
+
+    The API reports a bad id as an <entry> whose <id> is an api/errors URL; those are
+    skipped, never turned into a citation.
+    """
+    root = ET.fromstring(xml_text)
+    out = []
+    for e in root.findall("a:entry", _ATOM_NS):
+        if "/abs/" in (e.findtext("a:id", "", _ATOM_NS) or ""):
+            out.append(_parse_arxiv_entry(e))
+    return out
+
+
+def parse_arxiv_atom(xml_text):
+    """arXiv Atom API response -> entry (first entry), or None if no entry."""
+    entries = parse_arxiv_feed(xml_text)
+    return entries[0] if entries else None
 
 
 # ---- network ----
+ARXIV_API = "http://export.arxiv.org/api/query"
+CROSSREF_API = "https://api.crossref.org/works"
+
+
+class RateLimit:
+    """At most `concurrency` requests in flight, request starts at least `interval` s apart."""
+
+    def __init__(self, concurrency: int, interval: float):
+        self.interval = interval
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    @contextmanager
+    def slot(self):
+        with self._slots:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next)
+                self._next = start + self.interval
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+# arXiv's API terms: one connection, no more than one request every 3 s. Crossref's polite
+# pool (requests carrying a mailto) allows a few concurrent requests, ~10 per second.
+RATE_LIMITS = {
+    "arxiv": RateLimit(concurrency=1, interval=3.0),
+    "crossref": RateLimit(concurrency=3, interval=0.1),
+}
+
+
+def _not_found(r):
+    """True for a definitive miss (e.g. 404). A 429/5xx that outlived the session's retries
+    raises instead: it is a transient error, not a result to cache as "not found"."""
+    if r.status_code in http_session.RETRY_STATUSES:
+        r.raise_for_status()
+    return r.status_code != 200
+
+
 def fetch_arxiv(arxiv_id):
-    import requests
-    r = requests.get("http://export.arxiv.org/api/query", params={"id_list": arxiv_id},
-                     timeout=30, headers={"User-Agent": "scholar-slides/0.1"})
+    with RATE_LIMITS["arxiv"].slot():
+        r = http_session.get(ARXIV_API, params={"id_list": arxiv_id})
     r.raise_for_status()
     return parse_arxiv_atom(r.text)
 
 
 def fetch_crossref_by_doi(doi):
-    import requests
-    r = requests.get(f"https://api.crossref.org/works/{doi}", timeout=30,
-                     headers={"User-Agent": "scholar-slides/0.1 (mailto:noreply@example.com)"})
-    if r.status_code != 200:
+    with RATE_LIMITS["crossref"].slot():
+        r = http_session.get(f"{CROSSREF_API}/{doi}")
+    if _not_found(r):
         return None
     return parse_crossref_message(r.json()["message"])
 
 
-def fetch_crossref_by_title(title):
-    import requests
-    r = requests.get("https://api.crossref.org/works",
-                     params={"query.bibliographic": title, "rows": 1},
-                     timeout=30, headers={"User-Agent": "scholar-slides/0.1 (mailto:noreply@example.com)"})
-    if r.status_code != 200:
+# Candidates fetched per title search, and the work fields `parse_crossref_message` reads
+# (Crossref's `select` keeps the response to those instead of full records with references).
+CROSSREF_ROWS = 5
+CROSSREF_SELECT = ("DOI,title,author,type,container-title,published-print,published-online,"
+                   "issued,created")
+
+
+def _family(name):
+    parts = norm_title(name).split()
+    return parts[-1] if parts else ""
+
+
+def rank_candidates(title, entries, year=None, authors=None):
+    """The `entries` whose title passes `title_match`, best first.
+
+    Among verified candidates an exact (normalized) title beats a subtitle / near match, then
+    agreement with the optional hints counts: `year` within one (preprint vs. published),
+    then the number of hinted author family names present. Ties keep the input (relevance)
+    order. Title verification is never relaxed by a hint.
+    """
+    norm = norm_title(title)
+    if isinstance(authors, str):
+        authors = [authors]
+    wanted = {_family(a) for a in authors or ()} - {""}
+
+    year = _year_of(year)
+
+    def score(i):
+        e = entries[i]
+        y = 0
+        have_year = _year_of(e.get("year"))
+        if year is not None and have_year is not None:
+            y = 1 if abs(year - have_year) <= 1 else -1
+        have = {_family(a) for a in e.get("authors") or ()}
+        return (norm_title(e.get("title")) == norm, y, len(wanted & have), -i)
+
+    ok = match_titles(title, [e.get("title") for e in entries])
+    return [entries[i] for i in sorted(ok, key=score, reverse=True)]
+
+
+def fetch_crossref_by_title(title, year=None, authors=None, rows=None):
+    """Best verified Crossref work for a title: the top `rows` hits in one request, re-ranked
+    by `rank_candidates` — a wrong top hit no longer hides a correct second one."""
+    with RATE_LIMITS["crossref"].slot():
+        r = http_session.get(CROSSREF_API, params={"query.bibliographic": title,
+                                                   "rows": rows or CROSSREF_ROWS,
+                                                   "select": CROSSREF_SELECT})
+    if _not_found(r):
         return None
     items = r.json()["message"].get("items") or []
-    if not items:
-        return None
-    entry = parse_crossref_message(items[0])
-    # Reject a confidently-wrong top hit: only trust it if the returned title matches.
-    if not title_match(title, entry.get("title")):
-        return None
-    return entry
+    ranked = rank_candidates(title, [parse_crossref_message(it) for it in items], year, authors)
+    return ranked[0] if ranked else None
+
+
+# Ids per batched request. arXiv's API takes long id_lists (max_results must match); a
+# Crossref `filter=doi:...` query stays well under URL-length limits at this size.
+ARXIV_BATCH = 100
+CROSSREF_BATCH = 20
+
+
+def fetch_arxiv_batch(arxiv_ids):
+    """One arXiv API request for many ids -> {arxiv_id: entry} (ids absent from the feed
+    are simply missing)."""
+    with RATE_LIMITS["arxiv"].slot():
+        r = http_session.get(ARXIV_API, params={"id_list": ",".join(arxiv_ids),
+                                                "max_results": len(arxiv_ids)}, timeout=60)
+    r.raise_for_status()
+    return {e["arxiv"]: e for e in parse_arxiv_feed(r.text)}
+
+
+def fetch_crossref_by_dois(dois):
+    """One Crossref `filter=doi:...` request -> {lowercased doi: entry}."""
+    with RATE_LIMITS["crossref"].slot():
+        r = http_session.get(CROSSREF_API,
+                             params={"filter": ",".join(f"doi:{d}" for d in dois),
+                                     "rows": len(dois)}, timeout=60)
+    r.raise_for_status()
+    items = r.json()["message"].get("items") or []
+    return {(it.get("DOI") or "").lower(): parse_crossref_message(it) for it in items}
+
+
+def _from_cache(query, key, cache, refresh, offline):
+    """The cached (or offline) result for `query`, or None when it must be fetched."""
+    if cache is not None and not refresh:
+        hit = cache.get(*key)
+        if hit is not None:
+            return hit if hit.get("resolved") else {"resolved": False, "query": query}
+    if offline:
+        return {"resolved": False, "query": query, "error": "offline"}
+    return None
+
 
+def resolve(query, cache=None, refresh=False, offline=False, local=None):
+    """Resolve one citation query to a verified entry, or {resolved: False, query}.
 
-def resolve(query):
-    """Resolve one citation query to a verified entry, or {resolved: False, query}."""
+    A `local_bib.LocalBib` is tried first (titles must still pass `title_match`); a local
+    hit is returned as is, neither fetched nor cached. With a `bib_cache.BibCache`, a live
+    cached result is returned without any HTTP and fresh results are stored; `refresh` skips
+    the lookup (but still stores), `offline` never touches the network — a cache miss is then
+    unresolved with error "offline".
+
+    `query` may be a dict carrying a year / author hint for title queries (see
+    `split_query`); hints only re-rank verified Crossref candidates.
+    """
+    query, hints = split_query(query)
     kind, val = classify_query(query)
+    if local is not None:
+        e = local.lookup(kind, val)
+        if e is not None:
+            return e
+    key = cache_key(kind, val, hints)
+    known = _from_cache(query, key, cache, refresh, offline)
+    if known is not None:
+        return known
     try:
         if kind == "arxiv":
             e = fetch_arxiv(val)
         elif kind == "doi":
             e = fetch_crossref_by_doi(val)
         else:
-            e = fetch_crossref_by_title(val)
+            e = fetch_crossref_by_title(val, **hints)
     except Exception as exc:  # network/parse failure -> unresolved, never fabricated
         return {"resolved": False, "query": query, "error": str(exc)}
-    return e or {"resolved": False, "query": query}
+    e = e or {"resolved": False, "query": query}
+    if cache is not None:
+        cache.put(*key, e)
+    return e
+
+
+def resolve_all(queries, cache=None, refresh=False, offline=False, workers: int = 8,
+                local=None, on_result=None):
+    """Resolve every query; results in input order, same semantics as `resolve`.
+
+    Identifier queries not served by `local` or the cache are batched: arXiv ids go
+    ARXIV_BATCH per `id_list` request and DOIs CROSSREF_BATCH per `filter=doi:` request, so an
+    arXiv-heavy 50-entry bibliography costs one or two requests. An id the batch response does not
+    contain is unresolved (and negatively cached); a failed batch request leaves its queries
+    unresolved with the error. Titles are looked up one by one. Batches and title lookups run
+    on `workers` threads; throughput per service is bounded by `RATE_LIMITS`, not `workers`.
+
+    `on_result(i, entry)` is called as each result is known (cache hits first, then network
+    results in completion order), one call at a time.
+    """
+    results = [None] * len(queries)
+    lock = threading.Lock()
+
+    def done(i, e):
+        results[i] = e
+        if on_result is not None:
+            with lock:
+                on_result(i, e)
+
+    texts = [split_query(q)[0] for q in queries]
+    pending = {"arxiv": {}, "doi": {}}   # normalized id -> indices of the queries asking
+    singles = []
+    for i, q in enumerate(texts):
+        kind, val = classify_query(q)
+        key = cache_key(kind, val)
+        if local is not None and kind != "title":
+            e = local.lookup(kind, val)
+            if e is not None:
+                done(i, e)
+                continue
+        if kind == "title" or (kind == "doi" and "," in val):   # a comma would split filter=
+            singles.append(i)
+            continue
+        known = _from_cache(q, key, cache, refresh, offline)
+        if known is not None:
+            done(i, known)
+        else:
+            pending[kind].setdefault(key[1], []).append(i)
+
+    def run_single(i):
+        done(i, resolve(queries[i], cache=cache, refresh=refresh, offline=offline, local=local))
+
+    def run_batch(kind, ids):
+        fetch = fetch_arxiv_batch if kind == "arxiv" else fetch_crossref_by_dois
+        try:
+            found = fetch(ids)
+        except Exception as exc:  # whole chunk unresolved, never fabricated, not cached
+            for k in ids:
+                for i in pending[kind][k]:
+                    done(i, {"resolved": False, "query": texts[i], "error": str(exc)})
+            return
+        for k in ids:
+            idx = pending[kind][k]
+            e = found.get(k)
+            if cache is not None:
+                cache.put(kind, k, e or {"resolved": False, "query": texts[idx[0]]})
+            for i in idx:
+                done(i, e or {"resolved": False, "query": texts[i]})
+
+    jobs = [lambda i=i: run_single(i) for i in singles]
+    for kind, size in (("arxiv", ARXIV_BATCH), ("doi", CROSSREF_BATCH)):
+        ids = list(pending[kind])
+        jobs += [lambda kind=kind, c=ids[n:n + size]: run_batch(kind, c)
+                 for n in range(0, len(ids), size)]
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            job()
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            list(ex.map(lambda job: job(), jobs))
+    return results
+
+
+# Queries resolved per `resolve_all` call when streaming to --ndjson-out: large enough to
+# fill ARXIV_BATCH / CROSSREF_BATCH requests, small enough that memory stays flat.
+STREAM_CHUNK = 1000
+
+
+def query_key(q):
+    """The full normalized identity of a query (string or `split_query` object): kind,
+    normalized id or title, and any title hints — what `--resume` matches answers on."""
+    text, hints = split_query(q)
+    kind, val = classify_query(text)
+    return "%s:%s" % cache_key(kind, val, hints)
+
 
+def iter_ndjson_queries(path):
+    """Queries from an NDJSON file, one per line, read lazily: a JSON string or a
+    `split_query` object. Blank lines are skipped; a line that is not JSON is taken as a
+    plain query string."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
 
-def resolve_all(queries):
-    return [resolve(q) for q in queries]
+
+def read_ndjson_queries(path):
+    """`iter_ndjson_queries` as a list."""
+    return list(iter_ndjson_queries(path))
+
+
+def _ndjson_records(path):
+    """(byte offset, record) for each complete, parseable line of an NDJSON output file."""
+    with open(path, "rb") as fh:
+        pos = 0
+        for line in fh:
+            start, pos = pos, pos + len(line)
+            if not line.endswith(b"\n"):
+                break
+            try:
+                yield start, json.loads(line)
+            except ValueError:
+                continue
+
+
+def _record_key(rec):
+    return rec.get("query_key") or query_key(rec.get("query") or "")
+
+
+def answered_queries(path):
+    """`query_key`s already answered in an NDJSON output file, for `--resume`.
+
+    A line torn by an interruption (no trailing newline) is cut off so appending continues
+    on a clean line. Results that carry an `error` do not count: they are retried, and the
+    retried line (later in the file) supersedes them. Lines written before results carried
+    a `query_key` are keyed on their `query` text.
+    """
+    try:
+        with open(path, "rb+") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            if size and _last_newline_end(fh, size) != size:
+                fh.truncate(_last_newline_end(fh, size))
+    except FileNotFoundError:
+        return set()
+    return {_record_key(rec) for _, rec in _ndjson_records(path) if not rec.get("error")}
+
+
+def _last_newline_end(fh, before):
+    """Offset just past the last newline before byte `before` (0 if none)."""
+    while before > 0:
+        start = max(0, before - (1 << 16))
+        fh.seek(start)
+        cut = fh.read(before - start).rfind(b"\n")
+        if cut >= 0:
+            return start + cut + 1
+        before = start
+    return 0
+
+
+def write_bib_from_ndjson(out_path, ndjson_path, queries):
+    """bib.json for `queries` (in their order) from an NDJSON output file, last line winning
+    per `query_key`. Only line offsets are held; each record is read back as it is written.
+    The NDJSON-only tags are dropped (`query` is kept on unresolved entries, as `resolve`
+    returns them), so the file matches a plain `--out`. Queries with no line are left out."""
+    offsets = {}
+    for pos, rec in _ndjson_records(ndjson_path):
+        offsets[_record_key(rec)] = pos
+    n = 0
+    with open(ndjson_path, "rb") as src, open(out_path, "w", encoding="utf-8") as out:
+        out.write("[")
+        for q in queries:
+            pos = offsets.get(query_key(q))
+            if pos is None:
+                continue
+            src.seek(pos)
+            rec = json.loads(src.readline())
+            rec.pop("query_key", None)
+            if rec.get("resolved"):
+                rec.pop("query", None)
+            out.write(("," if n else "") + "\n  " + json.dumps(rec, ensure_ascii=False))
+            n += 1
+        out.write("\n]\n" if n else "]\n")
+    return n
 
 
 def main(argv):
     import argparse
     ap = argparse.ArgumentParser(description="Resolve citations via arXiv/DOI/Crossref (Zotero-first fallback).")
     ap.add_argument("queries", nargs="*", help="arXiv ids, DOIs, or titles")
-    ap.add_argument("--json", help="read a JSON array of queries from this file")
-    ap.add_argument("--out", help="write resolved bib.json here")
+    ap.add_argument("--json", help="read a JSON array of queries from this file (strings, or "
+                                   '{"title", "year", "authors"} objects)')
+    ap.add_argument("--from-ingest", metavar="INGEST_JSON",
+                    help="also resolve every DOI / arXiv id cited in a bundle's ingest.json")
+    ap.add_argument("--ndjson", metavar="PATH",
+                    help="read queries from NDJSON (one JSON string / object per line)")
+    ap.add_argument("--out", help="write resolved bib.json here (with --ndjson-out: built "
+                                  "from that file, so a --resume run's bib.json is complete)")
+    ap.add_argument("--ndjson-out", metavar="PATH",
+                    help="append each result as one JSON line, flushed as soon as it resolves")
+    ap.add_argument("--resume", action="store_true",
+                    help="skip queries already answered in --ndjson-out (errors are retried)")
+    ap.add_argument("--library", action="append", default=[],
+                    help="local library tried first: .bib, CSL-JSON .json or zotero.sqlite "
+                         "(repeatable)")
+    ap.add_argument("--library-index", default=None,
+                    help="where the library index is kept (default: "
+                         "~/.cache/scholar-slides/library-index.json)")
+    ap.add_argument("--cache", default=bib_cache.DEFAULT_PATH,
+                    help="SQLite citation cache (default: %(default)s)")
+    ap.add_argument("--no-cache", action="store_true", help="neither read nor write the cache")
+    ap.add_argument("--ttl-days", type=float, default=bib_cache.DEFAULT_TTL / 86400,
+                    help="how long a resolved entry stays valid")
+    ap.add_argument("--negative-ttl-days", type=float,
+                    default=bib_cache.DEFAULT_NEGATIVE_TTL / 86400,
+                    help="how long a not-found result stays valid")
+    ap.add_argument("--workers", type=int, default=8,
+                    help="concurrent lookups (per-service rate limits still apply)")
+    ap.add_argument("--mailto", default=http_session.MAILTO,
+                    help="contact address sent in the User-Agent (Crossref polite pool)")
+    ap.add_argument("--retries", type=int, default=4,
+                    help="retries on connection errors, 429 and 5xx (honours Retry-After)")
+    ap.add_argument("--max-retry-after", type=float, default=60,
+                    help="longest Retry-After (s) to wait out; a longer one leaves the query "
+                         "unresolved with an error")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--refresh", action="store_true",
+                      help="ignore cached entries, re-fetch and update the cache")
+    mode.add_argument("--offline", action="store_true",
+                      help="resolve from the cache only; no network access")
     args = ap.parse_args(argv)
-
-    queries = list(args.queries)
-    if args.json:
-        queries += json.load(open(args.json, encoding="utf-8"))
-    results = resolve_all(queries)
-    if args.out:
-        json.dump(results, open(args.out, "w", encoding="utf-8"), ensure_ascii=False, indent=2)
-    n_ok = sum(1 for r in results if r.get("resolved"))
-    for r in results:
+    if args.resume and not args.ndjson_out:
+        ap.error("--resume needs --ndjson-out")
+
+    http_session.configure(mailto=args.mailto, retries=args.retries,
+                           max_retry_after=args.max_retry_after)
+
+    def all_queries():
+        yield from args.queries
+        if args.json:
+            with open(args.json, encoding="utf-8") as fh:
+                yield from json.load(fh)
+        if args.ndjson:
+            yield from iter_ndjson_queries(args.ndjson)
+        if args.from_ingest:
+            from ingest_pdf import cited_identifiers
+
+            with open(args.from_ingest, encoding="utf-8") as fh:
+                ingest = json.load(fh)
+            yield from cited_identifiers(ingest["full_text"], ingest["meta"].get("arxiv_id"))
+
+    local = None
+    if args.library:
+        import local_bib
+
+        local = local_bib.LocalBib.load(args.library,
+                                        args.library_index or local_bib.DEFAULT_INDEX)
+    cache = None
+    if not args.no_cache:
+        cache = bib_cache.BibCache(args.cache, ttl=args.ttl_days * 86400,
+                                   negative_ttl=args.negative_ttl_days * 86400)
+
+    def show(r):
         if r.get("resolved"):
-            print(f"  [ok]  {r['key']}: {r['formatted']}")
+            print(f"  [ok]  {r['key']}: {r['formatted']}", flush=True)
         else:
-            print(f"  [UNVERIFIED] {r.get('query')}")
-    print(f"resolved {n_ok}/{len(results)}")
+            print(f"  [UNVERIFIED] {r.get('query')}", flush=True)
+
+    resolve_opts = dict(cache=cache, refresh=args.refresh, offline=args.offline,
+                        workers=args.workers, local=local)
+    n_ok = n_done = n_skipped = 0
+    if args.ndjson_out:
+        # Streamed: queries are read and resolved STREAM_CHUNK at a time; each result is
+        # printed and appended the moment it is known (in completion order, tagged with its
+        # query and `query_key`), so a long run holds one chunk, shows progress and can be
+        # resumed. --out is then assembled from the NDJSON file.
+        answered = answered_queries(args.ndjson_out) if args.resume else set()
+        with open(args.ndjson_out, "a" if args.resume else "w", encoding="utf-8") as out_fh:
+            chunk = []
+
+            def on_result(i, r):
+                nonlocal n_ok, n_done
+                q = chunk[i]
+                out_fh.write(json.dumps({**r, "query": split_query(q)[0],
+                                         "query_key": query_key(q)}, ensure_ascii=False)
+                             + "\n")
+                out_fh.flush()
+                n_done += 1
+                n_ok += bool(r.get("resolved"))
+                show(r)
+
+            for q in all_queries():
+                if answered and query_key(q) in answered:
+                    n_skipped += 1
+                    continue
+                chunk.append(q)
+                if len(chunk) == STREAM_CHUNK:
+                    resolve_all(chunk, on_result=on_result, **resolve_opts)
+                    chunk = []
+            if chunk:
+                resolve_all(chunk, on_result=on_result, **resolve_opts)
+        if args.out:
+            write_bib_from_ndjson(args.out, args.ndjson_out, all_queries())
+    else:
+        results = resolve_all(list(all_queries()), **resolve_opts)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as fh:
+                json.dump(results, fh, ensure_ascii=False, indent=2)
+        for r in results:
+            show(r)
+        n_done, n_ok = len(results), sum(1 for r in results if r.get("resolved"))
+    print(f"resolved {n_ok}/{n_done}"
+          + (f", {n_skipped} already answered" if args.resume else "")
+          + (f" (cache: {cache.hits} hit, {cache.misses} miss)" if cache else ""))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""The one HTTP client every network path in the scripts goes through.
+
+`fetch_bib` (arXiv / Crossref) and `prepare_source` / `pdf_mirror` (arXiv PDFs) used to call
+`requests.get` per request — a fresh TCP + TLS handshake every time, which dominated a bulk
+citation run. `session()` is a process-wide `requests.Session` with:
+
+  * keep-alive connection pooling (up to `pool_maxsize` connections per host, so the
+    concurrent resolver's threads each keep a warm connection);
+  * one User-Agent carrying a contact mailto (Crossref routes such requests to its polite
+    pool; arXiv asks for an identifiable client);
+  * retries with exponential backoff on 429 and 5xx, honouring the server's `Retry-After` —
+    a rate-limited or briefly unavailable API is waited out, not turned into an unresolved
+    citation. A `Retry-After` longer than `max_retry_after` seconds is not waited out: the
+    429/503 is returned as is (callers report it as an error, never cache it), so a server
+    asking for an hour cannot stall a worker for an hour. A failed connect is retried once
+    only: an unreachable host (offline machine, DNS failure) should fail fast.
+
+`configure()` changes these (and drops the current session); a forked worker process gets a
+fresh session instead of sharing the parent's sockets.
+"""
+from __future__ import annotations
+
+import os
+import threading
+
+USER_AGENT = "scholar-slides/0.1"
+MAILTO = "noreply@example.com"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_settings = {"user_agent": USER_AGENT, "mailto": MAILTO, "retries": 4, "backoff": 0.5,
+             "max_retry_after": 60, "pool_maxsize": 16, "timeout": 30}
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+
+
+def configure(**settings):
+    """Update session settings (user_agent, mailto, retries, backoff, max_retry_after,
+    pool_maxsize, timeout)."""
+    global _session
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise TypeError(f"unknown session settings: {sorted(unknown)}")
+    with _lock:
+        _settings.update(settings)
+        _session = None
+
+
+def user_agent() -> str:
+    ua, mailto = _settings["user_agent"], _settings["mailto"]
+    return f"{ua} (mailto:{mailto})" if mailto else ua
+
+
+_RetryClass = None
+
+
+def _retry_class():
+    """urllib3 `Retry` that gives up instead of sleeping past `max_retry_after` seconds."""
+    global _RetryClass
+    if _RetryClass is None:
+        from urllib3.exceptions import MaxRetryError, ResponseError
+        from urllib3.util.retry import Retry
+
+        class CappedRetry(Retry):
+            def __init__(self, *args, max_retry_after=None, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.max_retry_after = max_retry_after
+
+            def new(self, **kwargs):
+                retry = super().new(**kwargs)
+                retry.max_retry_after = self.max_retry_after
+                return retry
+
+            def increment(self, method=None, url=None, response=None, error=None,
+                          _pool=None, _stacktrace=None):
+                wait = self.get_retry_after(response) if response is not None else None
+                if wait is not None and self.max_retry_after is not None \
+                        and wait > self.max_retry_after:
+                    # exhausted, as far as urlopen is concerned: with raise_on_status=False
+                    # it hands back the 429/503 instead of sleeping
+                    raise MaxRetryError(_pool, url, ResponseError(
+                        f"Retry-After {wait:.0f}s exceeds {self.max_retry_after}s"))
+                return super().increment(method, url, response, error, _pool, _stacktrace)
+
+        _RetryClass = CappedRetry
+    return _RetryClass
+
+
+def session():
+    """The shared, pooled, retrying `requests.Session` for this process."""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            retry = _retry_class()(
+                total=_settings["retries"], connect=min(1, _settings["retries"]),
+                backoff_factor=_settings["backoff"], status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET"}), respect_retry_after_header=True,
+                raise_on_status=False, max_retry_after=_settings["max_retry_after"])
+            adapter = HTTPAdapter(max_retries=retry, pool_maxsize=_settings["pool_maxsize"])
+            s = requests.Session()
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["User-Agent"] = user_agent()
+            _session, _session_pid = s, os.getpid()
+        return _session
+
+
+def get(url, **kwargs):
+    """`session().get` with the configured default timeout."""
+    kwargs.setdefault("timeout", _settings["timeout"])
+    return session().get(url, **kwargs)
@@ -7,7 +7,9 @@ digest* (see references/ingestion.md), and detects an arXiv id so the caller can
 prefer the arXiv LaTeX source (equations + .bib come for free).
 
 Ported from ppt-master's PyMuPDF source-to-markdown step, narrowed to what Stage 1
-needs. `detect_arxiv_id` is pure/unit-tested; `extract` is the PyMuPDF integration.
+needs. `detect_arxiv_id`, `reference_section` and `cited_identifiers` (the DOIs / arXiv ids a
+paper cites, for `prepare_source`'s bibliography prefetch) are pure/unit-tested; `extract` is
+the PyMuPDF integration.
 """
 from __future__ import annotations
 
@@ -20,6 +22,13 @@ _ARXIV_RE = re.compile(r"arXiv:\s*(\d{4}\.\d{4,5})(?:v\d+)?", re.IGNORECASE)
 # — the id is immediately followed by a [category] tag. A cited preprint in the reference list is
 # followed by a period/comma, so requiring the [category] tag rejects reference-list ids.
 _ARXIV_STAMP = re.compile(r"arXiv:\s*(\d{4}\.\d{4,5})(?:v\d+)?\s*\[", re.IGNORECASE)
+# In a reference list an arXiv id is written "arXiv:1706.03762", "arxiv.org/abs/1706.03762",
+# "CoRR abs/1706.03762" or as its DataCite DOI "10.48550/arXiv.1706.03762".
+_CITED_ARXIV = re.compile(r"(?:arXiv:\s*|arxiv\.org/(?:abs|pdf)/|\babs/|10\.48550/arXiv\.)"
+                          r"(\d{4}\.\d{4,5})", re.IGNORECASE)
+_CITED_DOI = re.compile(r"\b(10\.\d{4,9}/[^\s\"<>]+)")
+_REFS_HEADING = re.compile(r"^[ \t]*(?:\d+\.?|[IVX]+\.)?[ \t]*(?:references|bibliography|"
+                           r"literature cited)[ \t]*$", re.IGNORECASE | re.MULTILINE)
 
 
 def detect_arxiv_id(text, stamp_only: bool = False):
@@ -38,9 +47,56 @@ def detect_arxiv_id(text, stamp_only: bool = False):
     return m.group(1) if m else None
 
 
+def reference_section(full_text):
+    """The text after the LAST "References" / "Bibliography" heading line (appendices that
+    follow are included), or the whole text when there is no such heading."""
+    t = full_text or ""
+    heads = list(_REFS_HEADING.finditer(t))
+    return t[heads[-1].end():] if heads else t
+
+
+def cited_identifiers(full_text, own_arxiv_id=None):
+    """arXiv ids and DOIs cited in the reference section, de-duplicated, in order of appearance.
+
+    Returned as `fetch_bib` queries: bare arXiv ids ("1706.03762") and DOIs. The paper's own
+    id is left out, and so is an arXiv DataCite DOI (it is reported as its arXiv id).
+    """
+    refs = reference_section(full_text)
+    found = []
+    for m in _CITED_ARXIV.finditer(refs):
+        found.append((m.start(), m.group(1)))
+    for m in _CITED_DOI.finditer(refs):
+        doi = m.group(1).rstrip(".,;:")
+        while doi[-1] in ")]}" and doi.count(doi[-1]) > doi.count({")": "(", "]": "[",
+                                                                   "}": "{"}[doi[-1]]):
+            doi = doi[:-1].rstrip(".,;:")
+        if not doi.lower().startswith("10.48550/arxiv."):
+            found.append((m.start(), doi))
+    seen = {own_arxiv_id} if own_arxiv_id else set()
+    out = []
+    for _, q in sorted(found):
+        if q.lower() not in seen:
+            seen.add(q.lower())
+            out.append(q)
+    return out
+
+
+def text_dict(page):
+    """`page.get_text("dict")` WITHOUT image payloads.
+
+    The default dict flags include TEXT_PRESERVE_IMAGES, which decodes and copies the pixel
+    data of every embedded raster into type-1 blocks — on scan-heavy papers that is hundreds
+    of MB nobody reads. Only text blocks are used here; image rects come from
+    `page.get_image_info()` where needed.
+    """
+    import fitz
+
+    return page.get_text("dict", flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES)
+
+
 def _page_blocks(page):
     out = []
-    for b in page.get_text("dict").get("blocks", []):
+    for b in text_dict(page).get("blocks", []):
         if b.get("type", 0) != 0:  # 0 = text block
             continue
         text = " ".join(
@@ -51,28 +107,43 @@ def _page_blocks(page):
     return out
 
 
-def extract(pdf_path):
-    """Return {path, n_pages, meta:{title, arxiv_id}, pages:[{page, blocks, text}], full_text}."""
-    import fitz
-
-    doc = fitz.open(pdf_path)
+def _extract_pages(doc, start, stop):
+    """Per-page records for 0-based pages [start, stop) of an open document."""
     pages = []
-    parts = []
-    for i, page in enumerate(doc):
-        ptext = page.get_text("text")
-        parts.append(ptext)
-        pages.append({"page": i + 1, "blocks": _page_blocks(page), "text": ptext})
-    full_text = "\n".join(parts)
-    # The paper's own arXiv id is the first-page stamp only — scanning full_text would pick up an
-    # id cited in the reference list (a different paper) on a journal PDF with no arXiv version.
-    meta = {
-        "title": (doc.metadata or {}).get("title") or None,
-        "arxiv_id": detect_arxiv_id(parts[0] if parts else "", stamp_only=True),
-    }
-    n_pages = doc.page_count
-    doc.close()
+    for i in range(start, stop):
+        page = doc[i]
+        pages.append({"page": i + 1, "blocks": _page_blocks(page), "text": page.get_text("text")})
+    return pages
+
+
+def extract(pdf, workers: int = 1):
+    """Return {path, n_pages, meta:{title, arxiv_id}, pages:[{page, blocks, text}], full_text}.
+
+    `pdf` is a path or an already-open `fitz.Document` (shared, left open). workers > 1
+    extracts page ranges in that many processes (see `page_pool`); the result is identical to
+    the serial walk.
+    """
+    import page_pool
+
+    with page_pool.open_doc(pdf) as doc:
+        if workers > 1 and doc.page_count > 1:
+            path = page_pool.doc_path(doc, "workers > 1")
+            pages = page_pool.map_page_ranges(_extract_pages, path, doc.page_count, workers)
+        else:
+            pages = _extract_pages(doc, 0, doc.page_count)
+        parts = [p["text"] for p in pages]
+        full_text = "\n".join(parts)
+        # The paper's own arXiv id is the first-page stamp only — scanning full_text would pick
+        # up an id cited in the reference list (a different paper) on a journal PDF with no
+        # arXiv version.
+        meta = {
+            "title": (doc.metadata or {}).get("title") or None,
+            "arxiv_id": detect_arxiv_id(parts[0] if parts else "", stamp_only=True),
+        }
+        n_pages = doc.page_count
+        path = pdf if isinstance(pdf, str) else doc.name
     return {
-        "path": pdf_path,
+        "path": path,
         "n_pages": n_pages,
         "meta": meta,
         "pages": pages,
@@ -87,9 +158,16 @@ def main(argv):
     ap.add_argument("pdf")
     ap.add_argument("--out", help="write JSON here (default: stdout summary)")
     ap.add_argument("--full", action="store_true", help="include per-block layout in --out")
+    ap.add_argument("--workers", type=int, default=1, help="page-parallel worker processes")
+    ap.add_argument("--profile", action="store_true",
+                    help="print wall/CPU time and process peak RSS to stderr")
     args = ap.parse_args(argv)
 
-    d = extract(args.pdf)
+    import profiling
+
+    profile = {}
+    with profiling.measure(profile, "ingest"):
+        d = extract(args.pdf, workers=args.workers)
     if args.out:
         payload = d if args.full else {k: v for k, v in d.items() if k != "pages"}
         with open(args.out, "w", encoding="utf-8") as fh:
@@ -98,6 +176,8 @@ def main(argv):
     else:
         print(f"pages={d['n_pages']} arxiv_id={d['meta']['arxiv_id']} title={d['meta']['title']!r}")
         print(f"chars={len(d['full_text'])}")
+    if args.profile:
+        profiling.print_profile(profile)
 
 
 if __name__ == "__main__":
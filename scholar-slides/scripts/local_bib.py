@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""Offline local bibliography: the first resolution tier of `fetch_bib.resolve`.
+
+The skill is Zotero-first, but the script used to go straight to the network. This loads the
+user's own libraries — BibTeX (`.bib`), CSL-JSON (`.json`) and Zotero's `zotero.sqlite`
+(opened read-only; a temporary copy while Zotero runs and holds its lock) — into an index:
+
+  * `doi` / `arxiv` hash maps (DOIs lowercased; arXiv ids found in eprint/url/extra/archive
+    fields and in arXiv DataCite DOIs `10.48550/arXiv.<id>`);
+  * an exact normalized-title map, then a trigram index over normalized titles for the
+    inexact case. Trigram overlap only PICKS candidates; a candidate is accepted only if it
+    passes `fetch_bib.title_match`, the same order-sensitive guard network results go through.
+    Trigrams carried by more than `COMMON_FRAC` of the library ("the", "ing", " le") are not
+    walked — they would touch most entries and rank none — and the first candidate that
+    passes ends the search.
+
+The built index — entries, title map, trigram postings and per-title trigram counts — is
+saved as JSON next to a signature of its sources (path, size, mtime), so the next run loads
+it as is instead of re-parsing (or re-normalizing) a 20k-entry library. `parse_bibtex`,
+`entries_from_csl` and `trigrams` are pure/unit-tested.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+
+from fetch_bib import iter_title_matches, make_entry, norm_title
+
+DEFAULT_INDEX = os.path.join("~", ".cache", "scholar-slides", "library-index.json")
+INDEX_VERSION = 2
+_ARXIV_IN = re.compile(r"(?:arxiv[.:/\s]*|abs/|pdf/)(\d{4}\.\d{4,5})", re.IGNORECASE)
+_YEAR = re.compile(r"\b(1[5-9]\d\d|20\d\d)\b")
+_FIELD = re.compile(r"\s*,?\s*([A-Za-z][\w-]*)\s*=\s*")
+_BARE = re.compile(r"[^,#}\s]+")
+_CONCAT = re.compile(r"\s*#\s*")
+
+
+def trigrams(norm: str):
+    """Character trigrams of a normalized title, padded so short words still index."""
+    s = f"  {norm} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _arxiv_in(*texts):
+    for t in texts:
+        m = _ARXIV_IN.search(t or "")
+        if m:
+            return m.group(1)
+    return None
+
+
+def _clean_doi(doi):
+    doi = (doi or "").strip()
+    doi = re.sub(r"^(?:https?://(?:dx\.)?doi\.org/|doi:)", "", doi, flags=re.IGNORECASE)
+    return doi or None
+
+
+def _year(text):
+    m = _YEAR.search(str(text or ""))
+    return m.group(1) if m else None
+
+
+# ---- BibTeX ----
+def _delatex(s):
+    s = re.sub(r"\\[a-zA-Z]+\*?\s*", "", s)      # \emph, \textit, ...
+    s = re.sub(r"\\[^a-zA-Z\s]", "", s)          # accents: \" \' \`
+    return " ".join(s.replace("{", "").replace("}", "").replace("~", " ").split())
+
+
+def _balanced(text, i, close):
+    """Index just past the `close` matching the opener at text[i] (brace depth aware)."""
+    depth = 0
+    for j in range(i, len(text)):
+        c = text[j]
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+        if depth == 0 and j > i and c == close:
+            return j + 1
+    return len(text)
+
+
+def _fields(body):
+    out = {}
+    i, n = 0, len(body)
+    while i < n:
+        m = _FIELD.match(body, i)
+        if not m:
+            break
+        name, i = m.group(1).lower(), m.end()
+        parts = []
+        while i < n:
+            c = body[i]
+            if c == "{":
+                j = _balanced(body, i, "}")
+                parts.append(body[i + 1:j - 1])
+            elif c == '"':
+                j = _balanced(body, i, '"')
+                parts.append(body[i + 1:j - 1])
+            else:
+                t = _BARE.match(body, i)
+                j = t.end() if t else i + 1
+                parts.append(body[i:j])
+            i = j
+            h = _CONCAT.match(body, i)
+            if not h:
+                break
+            i = h.end()
+        out[name] = "".join(parts)
+    return out
+
+
+def parse_bibtex(text):
+    """BibTeX source -> list of (entry_type, fields dict); @string/@comment/@preamble skipped."""
+    out = []
+    pos = 0
+    for m in re.finditer(r"@\s*(\w+)\s*[{(]", text):
+        if m.start() < pos:
+            continue
+        etype = m.group(1).lower()
+        end = _balanced(text, m.end() - 1, "}" if text[m.end() - 1] == "{" else ")")
+        pos = end
+        if etype in ("string", "comment", "preamble"):
+            continue
+        body = text[m.end():end - 1]
+        comma = body.find(",")
+        out.append((etype, _fields(body[comma + 1:] if comma >= 0 else "")))
+    return out
+
+
+def _bibtex_author(name):
+    name = _delatex(name)
+    if "," in name:
+        last, first = name.split(",", 1)
+        name = f"{first.strip()} {last.strip()}"
+    return name.strip()
+
+
+def entries_from_bibtex(text):
+    out = []
+    for etype, f in parse_bibtex(text):
+        title = _delatex(f.get("title", ""))
+        if not title:
+            continue
+        authors = [_bibtex_author(a) for a in re.split(r"\s+and\s+", f.get("author", ""))
+                   if a.strip()]
+        doi = _clean_doi(f.get("doi"))
+        eprint = f.get("eprint", "").strip()
+        arxiv = (eprint.split("v")[0] if re.fullmatch(r"\d{4}\.\d{4,5}(v\d+)?", eprint)
+                 else _arxiv_in(f.get("journal"), f.get("url"), doi))
+        venue = _delatex(f.get("journal") or f.get("booktitle") or "") or None
+        kind = "inproceedings" if etype in ("inproceedings", "conference") else "article"
+        out.append(make_entry(title, authors, _year(f.get("year") or f.get("date")), venue, doi,
+                          arxiv, "bibtex", kind))
+    return out
+
+
+# ---- CSL-JSON ----
+def entries_from_csl(items):
+    """CSL-JSON items (a list, or {"items": [...]}) -> entries."""
+    if isinstance(items, dict):
+        items = items.get("items") or []
+    out = []
+    for it in items:
+        title = it.get("title")
+        if isinstance(title, list):
+            title = title[0] if title else ""
+        if not title:
+            continue
+        authors = [a.get("literal") or " ".join(p for p in (a.get("given"), a.get("family")) if p)
+                   for a in it.get("author") or []]
+        parts = (it.get("issued") or {}).get("date-parts") or [[None]]
+        year = parts[0][0] if parts and parts[0] else None
+        doi = _clean_doi(it.get("DOI"))
+        arxiv = _arxiv_in(it.get("URL"), it.get("note"), it.get("number"), doi)
+        venue = it.get("container-title")
+        if isinstance(venue, list):
+            venue = venue[0] if venue else None
+        kind = "inproceedings" if it.get("type") == "paper-conference" else "article"
+        out.append(make_entry(title, authors, year, venue or None, doi, arxiv, "csl-json", kind))
+    return out
+
+
+# ---- Zotero ----
+_ZOTERO_SKIP = ("attachment", "note", "annotation")
+
+
+def entries_from_zotero(path):
+    """Regular items of a `zotero.sqlite`, opened read-only.
+
+    A running Zotero keeps an exclusive lock on its database, so a locked file is read from
+    a temporary copy (with its `-wal`) instead: never written, never waited on.
+    """
+    try:
+        return _zotero_entries("file:" + os.path.abspath(path) + "?mode=ro")
+    except sqlite3.OperationalError as exc:
+        if "locked" not in str(exc):
+            raise
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = os.path.join(tmp, "zotero.sqlite")
+        shutil.copyfile(path, copy)
+        if os.path.exists(path + "-wal"):
+            shutil.copyfile(path + "-wal", copy + "-wal")
+        return _zotero_entries("file:" + copy)
+
+
+def _zotero_entries(uri):
+    db = sqlite3.connect(uri, uri=True)
+    try:
+        fields: dict = {}
+        for item_id, name, value in db.execute(
+                "SELECT i.itemID, f.fieldName, v.value FROM items i "
+                "JOIN itemTypes t ON t.itemTypeID = i.itemTypeID "
+                "JOIN itemData d ON d.itemID = i.itemID "
+                "JOIN fields f ON f.fieldID = d.fieldID "
+                "JOIN itemDataValues v ON v.valueID = d.valueID "
+                f"WHERE t.typeName NOT IN ({','.join('?' * len(_ZOTERO_SKIP))}) "
+                "AND i.itemID NOT IN (SELECT itemID FROM deletedItems)", _ZOTERO_SKIP):
+            fields.setdefault(item_id, {})[name] = value
+        types = dict(db.execute("SELECT i.itemID, t.typeName FROM items i "
+                                "JOIN itemTypes t ON t.itemTypeID = i.itemTypeID"))
+        authors: dict = {}
+        for item_id, first, last in db.execute(
+                "SELECT ic.itemID, c.firstName, c.lastName FROM itemCreators ic "
+                "JOIN creators c ON c.creatorID = ic.creatorID "
+                "JOIN creatorTypes ct ON ct.creatorTypeID = ic.creatorTypeID "
+                "WHERE ct.creatorType = 'author' ORDER BY ic.itemID, ic.orderIndex"):
+            authors.setdefault(item_id, []).append(" ".join(p for p in (first, last) if p))
+    finally:
+        db.close()
+    out = []
+    for item_id, f in fields.items():
+        if not f.get("title"):
+            continue
+        doi = _clean_doi(f.get("DOI"))
+        arxiv = _arxiv_in(f.get("archiveID"), f.get("url"), f.get("extra"), doi)
+        venue = f.get("publicationTitle") or f.get("proceedingsTitle") or f.get("conferenceName")
+        kind = "inproceedings" if types.get(item_id) == "conferencePaper" else "article"
+        out.append(make_entry(f["title"], authors.get(item_id, []), _year(f.get("date")), venue,
+                          doi, arxiv, "zotero", kind))
+    return out
+
+
+def load_entries(path):
+    """Entries from one library file, by extension (.bib / .json / .sqlite)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".sqlite", ".db"):
+        return entries_from_zotero(path)
+    with open(path, encoding="utf-8") as fh:
+        if ext == ".json":
+            return entries_from_csl(json.load(fh))
+        return entries_from_bibtex(fh.read())
+
+
+# ---- index ----
+class LocalBib:
+    """DOI / arXiv / title index over local library entries; `lookup` is `resolve`'s tier 0."""
+
+    COMMON_FRAC = 0.05      # trigrams in more than this share of titles are not walked...
+    COMMON_MIN = 64         # ...once that share exceeds this many entries
+
+    def __init__(self, entries, titles=None, ntri=None, postings=None):
+        self.entries = entries
+        self.doi = {}
+        self.arxiv = {}
+        for i, e in enumerate(entries):
+            if e.get("doi"):
+                self.doi.setdefault(e["doi"].lower(), i)
+            if e.get("arxiv"):
+                self.arxiv.setdefault(e["arxiv"], i)
+        if titles is None or ntri is None or postings is None:
+            titles, ntri, postings = {}, [], {}
+            for i, e in enumerate(entries):
+                norm = norm_title(e["title"])
+                titles.setdefault(norm, i)
+                tri = trigrams(norm)
+                ntri.append(len(tri))
+                for t in tri:
+                    postings.setdefault(t, []).append(i)
+        self.titles = titles
+        self.ntri = ntri
+        self.postings = postings
+        self._by_ntri = sorted(range(len(ntri)), key=ntri.__getitem__)   # shortest first
+        self._ntri_sorted = [ntri[i] for i in self._by_ntri]
+
+    @classmethod
+    def load(cls, sources, index_path=DEFAULT_INDEX):
+        """Index for `sources`, reusing the saved index when the sources are unchanged."""
+        index_path = os.path.expanduser(index_path) if index_path else None
+        sig = [[os.path.abspath(p), os.stat(p).st_size, os.stat(p).st_mtime_ns]
+               for p in sources]
+        if index_path:
+            try:
+                with open(index_path, encoding="utf-8") as fh:
+                    saved = json.load(fh)
+                if saved.get("version") == INDEX_VERSION and saved.get("sources") == sig:
+                    return cls(saved["entries"], saved["titles"], saved["ntri"],
+                               saved["postings"])
+            except (FileNotFoundError, ValueError, KeyError):
+                pass
+        entries = [e for p in sources for e in load_entries(p)]
+        index = cls(entries)
+        if index_path:
+            os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+            tmp = index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump({"version": INDEX_VERSION, "sources": sig, "entries": entries,
+                           "titles": index.titles, "ntri": index.ntri,
+                           "postings": index.postings}, fh, ensure_ascii=False)
+            os.replace(tmp, index_path)
+        return index
+
+    def find_title(self, title, min_overlap: float = 0.5):
+        """First local entry, by trigram overlap, whose title passes `title_match`, or None.
+
+        Candidates are entries sharing at least `min_overlap` of the smaller trigram set —
+        well below what any title `title_match` accepts shares. Common trigrams are skipped
+        and the threshold lowered by their number; entries whose lowered threshold reaches
+        zero need not share a walked trigram, so those (short titles) are scored as well,
+        and when that would be every entry nothing is skipped. So no candidate is lost;
+        candidates are then tried by overlap and the first accepted one is returned.
+        """
+        norm = norm_title(title)
+        if not norm:
+            return None
+        if norm in self.titles:
+            return self.entries[self.titles[norm]]
+        q = trigrams(norm)
+        cap = max(self.COMMON_MIN, self.COMMON_FRAC * len(self.entries))
+        lists = sorted((self.postings.get(t, ()) for t in q), key=len)
+        walk = [p for p in lists if len(p) <= cap]
+        skipped = len(lists) - len(walk)
+        if skipped >= min_overlap * len(q):
+            walk, skipped = lists, 0
+        counts: dict = {}
+        for posting in walk:
+            for i in posting:
+                counts[i] = counts.get(i, 0) + 1
+        if skipped:
+            short = bisect.bisect_right(self._ntri_sorted, skipped / min_overlap)
+            for i in self._by_ntri[:short]:
+                counts.setdefault(i, 0)
+        ranked = sorted((i for i, shared in counts.items()
+                         if shared >= min_overlap * min(len(q), self.ntri[i]) - skipped),
+                        key=lambda i: (-counts[i], i))
+        for k in iter_title_matches(title, (self.entries[i]["title"] for i in ranked)):
+            return self.entries[ranked[k]]
+        return None
+
+    def lookup(self, kind, value):
+        """Entry for a `classify_query` result, or None."""
+        if kind == "arxiv":
+            i = self.arxiv.get(value)
+        elif kind == "doi":
+            i = self.doi.get(value.lower())
+        else:
+            return self.find_title(value)
+        return None if i is None else self.entries[i]
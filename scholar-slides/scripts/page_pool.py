@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Page-parallel execution for the PDF-walking Stage-1 scripts (`--workers N`).
+
+`ingest_pdf.extract` and `detect_figures.detect` are per-page loops over one document. This
+splits the page list into contiguous ranges, runs each range in its own worker process with
+its own `fitz.Document` handle (MuPDF documents are not shareable across processes), and
+concatenates the per-page results back in page order — so the merged output is exactly what
+the serial loop produces. Anything cross-page (e.g. detect's dedup) stays in the parent.
+
+`map_doc_batches` is the same idea for work that is already batched (e.g. crop jobs grouped by
+page): each worker opens the document ONCE, in its initializer, and serves many batches.
+
+`open_doc` lets every entry point take either a path or an already-open `fitz.Document`, so an
+orchestrator (prepare_source) can open the PDF once and share the handle — xref table, fonts
+and object caches are built once — across ingest, detect and crop.
+
+`page_ranges` is pure/unit-tested; `map_page_ranges` / `map_doc_batches` are the process-pool
+integration.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+
+def page_ranges(n_pages: int, n_chunks: int):
+    """Split 0-based pages [0, n_pages) into <= n_chunks contiguous (start, stop) ranges.
+
+    Sizes differ by at most one page; earlier ranges take the remainder. No empty ranges.
+    """
+    n_chunks = max(1, min(n_chunks, n_pages))
+    base, extra = divmod(n_pages, n_chunks)
+    out = []
+    start = 0
+    for k in range(n_chunks):
+        stop = start + base + (1 if k < extra else 0)
+        if stop > start:
+            out.append((start, stop))
+        start = stop
+    return out
+
+
+@contextmanager
+def open_doc(pdf):
+    """Yield an open document for `pdf` (a path or a `fitz.Document`).
+
+    A path is opened here and closed on exit; a Document passed in is shared, never closed.
+    Worker processes still need the path: see `doc_path`.
+    """
+    if isinstance(pdf, (str, bytes)) or hasattr(pdf, "__fspath__"):
+        import fitz
+
+        doc = fitz.open(pdf)
+        try:
+            yield doc
+        finally:
+            doc.close()
+    else:
+        yield pdf
+
+
+def doc_path(doc, need: str) -> str:
+    """The file behind `doc`, for work that reopens or re-reads it (workers, crop cache).
+
+    A document opened from memory (`fitz.open(stream=...)`, `fitz.open()`) has no file, and
+    one with unsaved edits no longer matches its file; either raises ValueError naming `need`
+    rather than letting workers open "" or hash stale bytes.
+    """
+    import os
+
+    name = getattr(doc, "name", None)
+    if not name or not os.path.isfile(name):
+        raise ValueError(f"{need} needs a file-backed PDF; this document was opened from "
+                         f"memory — save it and pass the path instead")
+    if getattr(doc, "is_dirty", False):
+        raise ValueError(f"{need} needs a PDF that matches its file; {name} has unsaved "
+                         f"changes — save it first")
+    return name
+
+
+def _run_range(task):
+    fn, pdf_path, start, stop = task
+    import fitz
+
+    doc = fitz.open(pdf_path)
+    try:
+        return fn(doc, start, stop)
+    finally:
+        doc.close()
+
+
+def map_page_ranges(fn, pdf_path, n_pages: int, workers: int):
+    """Run `fn(doc, start, stop) -> list` over page ranges in `workers` processes.
+
+    `fn` must be a module-level (picklable) function returning one list per range; the
+    lists are concatenated in page order.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = page_ranges(n_pages, workers)
+    if not ranges:
+        return []
+    out = []
+    with ProcessPoolExecutor(max_workers=len(ranges)) as ex:
+        for part in ex.map(_run_range, [(fn, pdf_path, a, b) for a, b in ranges]):
+            out.extend(part)
+    return out
+
+
+_WORKER_DOC = None
+
+
+def _open_worker_doc(pdf_path):
+    global _WORKER_DOC
+    import fitz
+
+    _WORKER_DOC = fitz.open(pdf_path)
+
+
+def _run_batch(task):
+    fn, batch = task
+    return fn(_WORKER_DOC, batch)
+
+
+def map_doc_batches(fn, pdf_path, batches, workers: int):
+    """Run `fn(doc, batch)` for each batch in `workers` processes; results in batch order.
+
+    Every worker process opens `pdf_path` once and reuses that handle for all the batches
+    it is handed. `fn` must be a module-level (picklable) function.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not batches:
+        return []
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(batches))),
+                             initializer=_open_worker_doc, initargs=(pdf_path,)) as ex:
+        return list(ex.map(_run_batch, [(fn, b) for b in batches]))
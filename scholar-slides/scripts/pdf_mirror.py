@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Streaming, resumable arXiv PDF download backed by a shared local mirror.
+
+`prepare_source` turns an arXiv id into a local PDF. Downloading the whole body into memory and
+re-fetching on every run is wasteful, so:
+
+  * the mirror (default ~/.cache/scholar-slides/arxiv, or a shared team dir) is checked
+    BEFORE any network access. Entries are keyed by id + version: `1706.03762v5.pdf` is
+    immutable; an unversioned `1706.03762.pdf` is "latest, as of the first fetch";
+  * a miss streams the response to `<entry>.part` in chunks and `os.replace`s it into place
+    only once complete — exactly the size the server announced — and PDF-shaped (arXiv
+    answers some requests with an HTML page);
+  * one writer per entry: `<entry>.lock` is created with O_EXCL, so concurrent fetches of
+    the same paper (parallel bundles, a shared team mirror) never interleave bytes in one
+    `.part`. A loser waits for the winner and uses its file; a lock whose owner has made no
+    progress for `STALE_LOCK_S` is taken over;
+  * an interrupted download leaves the `.part` behind, with the response's validator (ETag
+    or Last-Modified) beside it in `<entry>.part.json`. The next attempt sends
+    `Range: bytes=<have>-` plus `If-Range: <validator>` and appends only on a 206 that
+    starts at <have>; a changed file gets a full 200, which restarts cleanly. A `.part`
+    without a validator is never resumed.
+
+`mirror_name` is pure/unit-tested; `fetch_arxiv` is exercised against a local HTTP stand-in.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+ARXIV_PDF_BASE = "https://arxiv.org/pdf/"
+DEFAULT_MIRROR = os.path.join("~", ".cache", "scholar-slides", "arxiv")
+CHUNK = 1 << 16
+STALE_LOCK_S = 600
+LOCK_POLL_S = 0.2
+
+
+def mirror_name(arxiv_id: str, version: str | None = None) -> str:
+    """File name for an arXiv PDF in the mirror: `<id><version>.pdf` (version like "v3")."""
+    return f"{arxiv_id}{version or ''}.pdf"
+
+
+@contextmanager
+def _entry_lock(dest, stale_after: float = STALE_LOCK_S):
+    """Hold `<dest>.lock` (O_EXCL) for the block; yields True if another writer held it first.
+
+    A lock is stale when neither it nor the `.part` it guards has been touched for
+    `stale_after` seconds (a crashed owner); it is then removed and the race retried.
+    """
+    lock = dest + ".lock"
+    waited = False
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            break
+        except FileExistsError:
+            pass
+        waited = True
+        try:
+            touched = max(os.path.getmtime(p) for p in (lock, dest + ".part")
+                          if os.path.exists(p))
+        except ValueError:      # both gone: the owner just finished
+            continue
+        if time.time() - touched > stale_after:
+            try:
+                os.remove(lock)
+            except FileNotFoundError:
+                pass
+            continue
+        time.sleep(LOCK_POLL_S)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield waited
+    finally:
+        try:
+            os.remove(lock)
+        except FileNotFoundError:
+            pass
+
+
+def _expected_size(resp):
+    """Total size of the file behind a 200/206 response, or None if the server did not say."""
+    if resp.status_code == 206:
+        total = (resp.headers.get("Content-Range") or "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def download(url, dest, chunk: int = CHUNK, timeout: float = 60):
+    """Stream `url` to `dest`, resuming from `dest + ".part"` if an earlier attempt left one.
+
+    The body is written chunk by chunk (never held in memory) and moved to `dest` only when
+    complete. Only one process writes an entry at a time (`<dest>.lock`); one that had to
+    wait returns the winner's `dest` without downloading again. Goes through the shared
+    `http_session` (keep-alive, retries on 429/5xx). Raises `requests.HTTPError` on an HTTP
+    error, OSError on a short body (the `.part` is kept for a resume) and ValueError if the
+    body is not a PDF. Returns dest.
+    """
+    with _entry_lock(dest) as waited:
+        if waited and os.path.exists(dest):
+            return dest
+        return _download_locked(url, dest, chunk, timeout)
+
+
+def _download_locked(url, dest, chunk, timeout):
+    import http_session
+
+    part, meta_path = dest + ".part", dest + ".part.json"
+    try:
+        with open(meta_path, encoding="utf-8") as fh:
+            validator = json.load(fh).get("validator")
+    except (FileNotFoundError, ValueError):
+        validator = None
+    have = os.path.getsize(part) if validator and os.path.exists(part) else 0
+    # identity: Content-Length must count the bytes written, not a compressed stream
+    headers = {"Accept-Encoding": "identity"}
+    if have:
+        headers.update({"Range": f"bytes={have}-", "If-Range": validator})
+    with http_session.get(url, stream=True, timeout=timeout, headers=headers) as resp:
+        if resp.status_code == 416:          # stale .part (e.g. longer than the file): restart
+            _discard(part, meta_path)
+            return _download_locked(url, dest, chunk, timeout)
+        resp.raise_for_status()
+        resumed = (have and resp.status_code == 206 and (resp.headers.get("Content-Range") or "")
+                   .startswith(f"bytes {have}-"))
+        total = _expected_size(resp)
+        validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        if validator and not resumed:
+            with open(meta_path, "w", encoding="utf-8") as fh:
+                json.dump({"url": url, "validator": validator}, fh)
+        elif not validator:
+            _discard(meta_path)
+        with open(part, "ab" if resumed else "wb") as fh:
+            for block in resp.iter_content(chunk_size=chunk):
+                fh.write(block)
+    size = os.path.getsize(part)
+    if total is not None and size != total:
+        if size > total:
+            _discard(part, meta_path)
+        raise OSError(f"{url}: got {size} of {total} bytes")
+    with open(part, "rb") as fh:
+        magic = fh.read(5)
+    if magic != b"%PDF-":
+        _discard(part, meta_path)
+        raise ValueError(f"{url} did not return a PDF")
+    os.replace(part, dest)
+    _discard(meta_path)
+    return dest
+
+
+def _discard(*paths):
+    for p in paths:
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def fetch_arxiv(arxiv_id, version=None, work_dir=".", mirror_dir=None,
+                base_url=ARXIV_PDF_BASE):
+    """Return a local path to the arXiv PDF, placed in `work_dir` from the mirror.
+
+    The mirror is consulted first; only a miss touches the network. The copy in `work_dir`
+    is a hardlink where the filesystem allows it.
+    """
+    from crop_cache import place
+
+    mirror_dir = os.path.expanduser(mirror_dir or DEFAULT_MIRROR)
+    name = mirror_name(arxiv_id, version)
+    cached = os.path.join(mirror_dir, name)
+    if not os.path.exists(cached):
+        os.makedirs(mirror_dir, exist_ok=True)
+        download(base_url.rstrip("/") + "/" + arxiv_id + (version or ""), cached)
+    os.makedirs(work_dir, exist_ok=True)
+    dest = os.path.join(work_dir, name)
+    if not (os.path.exists(dest) and os.path.samefile(dest, cached)):
+        place(cached, dest)
+    return dest
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Stage 1 in bulk: build one digest-input bundle per source listed in a file.
+
+A journal club prepares tens of papers at a time. Running `prepare_source` once per paper
+serializes two very different kinds of work, so this splits them:
+
+  * fetching (arXiv downloads, via `prepare_source.resolve_input` and its mirror) is I/O
+    bound and runs in a thread pool (`download_workers`);
+  * ingest -> detect -> crop is CPU bound and runs in a process pool (`prepare_workers`),
+    fed as soon as each source's PDF is on disk.
+
+Each source gets its own bundle under `<out-root>/<stem>/` exactly as `prepare_source` would
+build it (incremental, same crop cache / mirror options). `<out-root>/batch.json` records,
+per source, its status ("ok" or "error", with the failing step and message), timings and
+the bundle's per-stage profile (see `profiling`). A failing source never aborts the batch.
+
+List file: one PDF path, arXiv id or arXiv URL per line; blank lines and `#` comments are
+ignored, repeated sources are prepared once.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+import prepare_source
+
+BATCH_FILE = "batch.json"
+
+
+def read_sources(path):
+    """Sources from a list file, in order, without blanks, `#` comments or repeats."""
+    with open(path, encoding="utf-8") as fh:
+        lines = [ln.split("#", 1)[0].strip() for ln in fh]
+    return list(dict.fromkeys(ln for ln in lines if ln))
+
+
+def plan_bundles(sources, out_root):
+    """Map each source to its bundle dir; colliding stems get `_2`, `_3`, ... suffixes."""
+    seen = {}
+    out = []
+    for src in sources:
+        stem = prepare_source.bundle_stem(src)
+        n = seen[stem] = seen.get(stem, 0) + 1
+        out.append(os.path.join(out_root, stem if n == 1 else f"{stem}_{n}"))
+    return out
+
+
+def _error(exc) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def _prepare_one(pdf, out_dir, opts):
+    """Process-pool task: build one bundle. Returns (manifest, seconds)."""
+    t0 = time.perf_counter()
+    manifest = prepare_source.prepare(pdf, out_dir=out_dir, **opts)
+    return manifest, time.perf_counter() - t0
+
+
+def prepare_batch(sources, out_root, download_workers: int = 4, prepare_workers: int = 2,
+                  mirror_dir=None, **opts):
+    """Prepare every source; returns (and writes to `<out_root>/batch.json`) the batch record.
+
+    `opts` are passed through to `prepare_source.prepare` (dpi, workers, cache_dir, ...).
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+    os.makedirs(out_root, exist_ok=True)
+    t0 = time.perf_counter()
+    entries = [{"source": src, "out_dir": d, "status": "pending", "timings": {}}
+               for src, d in zip(sources, plan_bundles(sources, out_root))]
+
+    def fetch(entry):
+        t = time.perf_counter()
+        try:
+            return prepare_source.resolve_input(entry["source"], entry["out_dir"],
+                                                mirror_dir=mirror_dir)
+        finally:
+            entry["timings"]["fetch_s"] = round(time.perf_counter() - t, 3)
+
+    with ThreadPoolExecutor(max_workers=max(1, download_workers)) as io_pool, \
+            ProcessPoolExecutor(max_workers=max(1, prepare_workers)) as cpu_pool:
+        fetching = {io_pool.submit(fetch, e): e for e in entries}
+        preparing = {}
+        for fut in as_completed(fetching):
+            entry = fetching[fut]
+            try:
+                entry["pdf"] = fut.result()
+            except Exception as exc:  # noqa: BLE001 — recorded per source, batch goes on
+                entry.update(status="error", step="fetch", error=_error(exc))
+                continue
+            preparing[cpu_pool.submit(_prepare_one, entry["pdf"], entry["out_dir"],
+                                      opts)] = entry
+        for fut in as_completed(preparing):
+            entry = preparing[fut]
+            try:
+                manifest, seconds = fut.result()
+            except Exception as exc:  # noqa: BLE001
+                entry.update(status="error", step="prepare", error=_error(exc))
+                continue
+            entry["timings"]["prepare_s"] = round(seconds, 3)
+            entry.update(status="ok", **{k: manifest[k] for k in (
+                "title", "n_pages", "n_figures", "n_tables", "n_flagged", "n_drawing_paths",
+                "profile")})
+
+    batch = {
+        "n_sources": len(entries),
+        "n_ok": sum(1 for e in entries if e["status"] == "ok"),
+        "n_failed": sum(1 for e in entries if e["status"] == "error"),
+        "wall_s": round(time.perf_counter() - t0, 3),
+        "sources": entries,
+    }
+    path = os.path.join(out_root, BATCH_FILE)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(batch, fh, ensure_ascii=False, indent=2)
+    return batch
+
+
+def main(argv):
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Stage 1 for many papers: one bundle per source.")
+    ap.add_argument("list_file", help="file with one PDF path / arXiv id / arXiv URL per line")
+    ap.add_argument("--out-root", default="out", help="bundles go to <out-root>/<stem>/")
+    ap.add_argument("--download-workers", type=int, default=4,
+                    help="concurrent downloads (threads)")
+    ap.add_argument("--prepare-workers", type=int, default=2,
+                    help="concurrent ingest/detect/crop runs (processes)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="page-parallel processes inside each prepare run")
+    ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--cache-dir", help="crop cache shared by all bundles "
+                                        "(default: per bundle)")
+    ap.add_argument("--no-cache", action="store_true", help="re-render every crop")
+    ap.add_argument("--mirror-dir", help="shared arXiv PDF mirror")
+    ap.add_argument("--profile", action="store_true",
+                    help="print each bundle's per-stage wall/CPU time and process peak RSS "
+                         "to stderr")
+    args = ap.parse_args(argv)
+
+    batch = prepare_batch(read_sources(args.list_file), args.out_root,
+                          download_workers=args.download_workers,
+                          prepare_workers=args.prepare_workers, mirror_dir=args.mirror_dir,
+                          dpi=args.dpi, workers=args.workers, cache_dir=args.cache_dir,
+                          use_cache=not args.no_cache)
+    for e in batch["sources"]:
+        if e["status"] == "ok":
+            print(f"  ok     {e['source']} -> {e['out_dir']} ({e['n_figures']} figures, "
+                  f"{e['n_tables']} tables, {e['timings']['prepare_s']}s)")
+            if args.profile:
+                import profiling
+
+                for line in profiling.format_profile(
+                        {k: v for k, v in e["profile"].items() if v}):
+                    print("    " + line, file=sys.stderr)
+        else:
+            print(f"  FAILED {e['source']} [{e['step']}] {e['error']}")
+    print(f"Batch: {batch['n_ok']}/{batch['n_sources']} bundles in {batch['wall_s']}s "
+          f"-> {os.path.join(args.out_root, BATCH_FILE)}")
+    return 1 if batch["n_failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
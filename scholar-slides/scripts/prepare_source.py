@@ -9,7 +9,12 @@ Output bundle (default out/<stem>/):
     ingest.json      {path, n_pages, meta:{title, arxiv_id}, full_text}
     figures.json     figure/table inventory with bboxes + render_as + confidence
     figures/*.png    cropped figure assets (+ reliable table reference snapshots)
-    manifest.json    summary for CKPT-1
+    manifest.json    summary for CKPT-1 (+ detect_stats: caption-less pages skipped, drawing
+                     paths, drawing rects before/after clustering; + profile: wall/CPU time
+                     and process peak RSS per stage, detect split into text/drawings/regions)
+    bib.json         with --prefetch-bib: every DOI / arXiv id in the reference list, resolved
+                     in one batched pass (`fetch_bib.resolve_all`, through its cache)
+    stages.json      incremental-build record: per-stage input hashes, params, artifact hashes
 
 This orchestrator only assembles the raw, faithful material — it does NOT synthesize the
 digest (that is the model's job, grounded in this bundle) and never invents content.
@@ -21,76 +26,220 @@ import os
 import re
 import sys
 
+import bib_cache
 import ingest_pdf
 import detect_figures
 import crop_figure
+import crop_cache
+import fetch_bib
+import pdf_mirror
+import profiling
+import stage_graph
 
 _ARXIV_ID = re.compile(r"^(\d{4}\.\d{4,5})(v\d+)?$")
-_ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf)/(\d{4}\.\d{4,5})", re.IGNORECASE)
+_ARXIV_URL = re.compile(r"arxiv\.org/(?:abs|pdf)/(\d{4}\.\d{4,5})(v\d+)?", re.IGNORECASE)
 
 
-def resolve_input(arg, work_dir):
-    """Return a local PDF path. Downloads from arXiv when given an id or arXiv URL."""
+def resolve_input(arg, work_dir, mirror_dir=None, base_url=pdf_mirror.ARXIV_PDF_BASE):
+    """Return a local PDF path. Fetches from arXiv when given an id or arXiv URL.
+
+    arXiv PDFs come from the local mirror (`pdf_mirror`, keyed by id + version) when present;
+    otherwise they are streamed into it, resuming a partial download if one was left behind.
+    """
     if os.path.isfile(arg):
         return arg
-    arxiv_id = None
-    m = _ARXIV_ID.match(arg.strip())
-    if m:
-        arxiv_id = m.group(1)
-    else:
-        m = _ARXIV_URL.search(arg)
-        if m:
-            arxiv_id = m.group(1)
-    if not arxiv_id:
+    m = _ARXIV_ID.match(arg.strip()) or _ARXIV_URL.search(arg)
+    if not m:
         raise FileNotFoundError(f"not a file, arXiv id, or arXiv URL: {arg!r}")
-    import requests
+    return pdf_mirror.fetch_arxiv(m.group(1), m.group(2), work_dir, mirror_dir=mirror_dir,
+                                  base_url=base_url)
+
+
+STAGES = ("ingest", "detect", "crop", "bib", "manifest")
+
+
+def bundle_stem(arg) -> str:
+    """Bundle directory name for a source: its file / id stem with non-word chars as `_`.
+
+    Only a `.pdf` suffix is dropped — `1706.03762` must not collapse to `1706`.
+    """
+    base = os.path.basename(str(arg).rstrip("/"))
+    if base.lower().endswith(".pdf"):
+        base = base[:-4]
+    return re.sub(r"\W+", "_", base) or "source"
 
-    os.makedirs(work_dir, exist_ok=True)
-    dest = os.path.join(work_dir, f"{arxiv_id}.pdf")
-    url = f"https://arxiv.org/pdf/{arxiv_id}"
-    resp = requests.get(url, timeout=60, headers={"User-Agent": "scholar-slides/0.1"})
-    resp.raise_for_status()
-    with open(dest, "wb") as fh:
-        fh.write(resp.content)
-    return dest
 
+def prepare(arg, out_dir=None, dpi=200, workers=1, cache_dir=None, use_cache=True,
+            cache_max_bytes=crop_cache.DEFAULT_MAX_BYTES, force=(), report=None,
+            mirror_dir=None, prefetch_bib=False, bib_cache_path=None):
+    """Build (or refresh) the Stage-1 bundle for `arg`; returns the manifest.
 
-def prepare(arg, out_dir=None, dpi=200):
-    stem = re.sub(r"\W+", "_", os.path.splitext(os.path.basename(str(arg)))[0]) or "source"
-    out_dir = out_dir or os.path.join("out", stem)
+    The bundle is a small stage graph — ingest.json -> figures.json -> figures/*.png ->
+    manifest.json — tracked in `stages.json` (see `stage_graph`). A stage reruns only when its
+    inputs (PDF hash, upstream artifact hashes, builder code and the local modules it
+    imports) or params (crop dpi) changed or an artifact was edited/removed; `force` names
+    stages to rebuild regardless ("all" for every stage). When `report` is a list,
+    (stage, "built"|"fresh") pairs are appended to it. `mirror_dir` is the arXiv PDF mirror
+    (see `resolve_input`).
+
+    `prefetch_bib` adds the "bib" stage: the DOIs and arXiv ids cited in the reference list
+    (`ingest_pdf.cited_identifiers`) are resolved in one batched, concurrent pass and written
+    to bib.json, warming the citation cache (`bib_cache_path`, default
+    `bib_cache.DEFAULT_PATH`) for the references slide. A bib.json with network errors in it
+    is rebuilt on the next run.
+
+    manifest.json's `profile` holds {wall_s, cpu_s, peak_rss_mb, rss_growth_mb} for download,
+    ingest, detect (with per-phase seconds) and crop (see `profiling`). A stage that was fresh
+    keeps the numbers from the run that built it.
+
+    The PDF is opened at most once per run — lazily, by the first stage that builds — and that
+    one `fitz.Document` is shared by ingest, detect and crop, so the xref table, fonts and
+    page trees are parsed once instead of three times. A fully fresh bundle never opens it.
+    """
+    out_dir = out_dir or os.path.join("out", bundle_stem(arg))
     os.makedirs(out_dir, exist_ok=True)
 
-    pdf = resolve_input(arg, out_dir)
-    ingest = ingest_pdf.extract(pdf)
-    ingest_payload = {k: v for k, v in ingest.items() if k != "pages"}
-    with open(os.path.join(out_dir, "ingest.json"), "w", encoding="utf-8") as fh:
-        json.dump(ingest_payload, fh, ensure_ascii=False, indent=2)
-
-    figures = detect_figures.detect(pdf)
-    with open(os.path.join(out_dir, "figures.json"), "w", encoding="utf-8") as fh:
-        json.dump(figures, fh, ensure_ascii=False, indent=2)
-
-    crops = crop_figure.crop_from_inventory(pdf, figures, os.path.join(out_dir, "figures"), dpi=dpi)
-
-    n_fig = sum(1 for f in figures if f["kind"] == "figure")
-    n_tab = sum(1 for f in figures if f["kind"] == "table")
-    n_loc = sum(1 for f in figures if f["figure_bbox"])
-    n_flag = sum(1 for f in figures if not f["figure_bbox"])
-    manifest = {
-        "pdf": pdf,
-        "out_dir": out_dir,
-        "n_pages": ingest["n_pages"],
-        "title": ingest["meta"]["title"],
-        "arxiv_id": ingest["meta"]["arxiv_id"],
-        "n_figures": n_fig,
-        "n_tables": n_tab,
-        "n_localized": n_loc,
-        "n_flagged": n_flag,
-        "crops": crops,
-    }
-    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
-        json.dump(manifest, fh, ensure_ascii=False, indent=2)
-    return manifest
+    profile = {}
+    with profiling.measure(profile, "download"):
+        pdf = resolve_input(arg, out_dir, mirror_dir=mirror_dir)
+    graph = stage_graph.StageGraph(out_dir, force)
+    pdf_hash = graph.digest(pdf)
+    ingest_path = os.path.join(out_dir, "ingest.json")
+    figures_path = os.path.join(out_dir, "figures.json")
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    bib_path = os.path.join(out_dir, "bib.json")
+    opened = []
+
+    def source():
+        if not opened:
+            import fitz
+
+            opened.append(fitz.open(pdf))
+        return opened[0]
+
+    try:
+        def build_ingest():
+            prof = {}
+            with profiling.measure(prof, "ingest"):
+                ingest = ingest_pdf.extract(source(), workers=workers)
+                ingest_payload = {k: v for k, v in ingest.items() if k != "pages"}
+                with open(ingest_path, "w", encoding="utf-8") as fh:
+                    json.dump(ingest_payload, fh, ensure_ascii=False, indent=2)
+            return [ingest_path], {"profile": prof["ingest"]}
+
+        ing = graph.run("ingest",
+                        {"pdf": pdf_hash, "code": graph.code_digest(ingest_pdf.__file__)},
+                        {}, build_ingest)
+
+        def build_detect():
+            detect_stats = {}
+            prof = {}
+            with profiling.measure(prof, "detect") as rec:
+                figures = detect_figures.detect(source(), workers=workers, stats=detect_stats)
+                with open(figures_path, "w", encoding="utf-8") as fh:
+                    json.dump(figures, fh, ensure_ascii=False, indent=2)
+            rec["phases"] = {k: detect_stats.pop(k) for k in detect_figures.PHASES}
+            return [figures_path], {"detect_stats": detect_stats, "profile": rec}
+
+        det = graph.run("detect",
+                        {"pdf": pdf_hash, "code": graph.code_digest(detect_figures.__file__)},
+                        {}, build_detect)
+
+        def build_crop():
+            with open(figures_path, encoding="utf-8") as fh:
+                figures = json.load(fh)
+            # Crops are content-addressed (PDF hash, page, clip, dpi): an unchanged figure is a
+            # file link, not a rasterization. Shared across bundles when --cache-dir points
+            # elsewhere.
+            cache = None
+            if use_cache:
+                cache = crop_cache.CropCache(cache_dir or os.path.join(out_dir, ".cache", "crops"),
+                                             max_bytes=cache_max_bytes)
+            prof = {}
+            with profiling.measure(prof, "crop"):
+                crops = crop_figure.crop_from_inventory(source(), figures,
+                                                        os.path.join(out_dir, "figures"),
+                                                        dpi=dpi, workers=workers, cache=cache,
+                                                        pdf_hash=pdf_hash)
+            return ([c["path"] for c in crops if c["status"] == "ok"],
+                    {"crops": crops, "profile": prof["crop"]})
+
+        crp = graph.run("crop", {"pdf": pdf_hash, "figures": det["outputs"],
+                                 "code": graph.code_digest(crop_figure.__file__)}, {"dpi": dpi},
+                        build_crop)
+
+        def build_bib():
+            with open(ingest_path, encoding="utf-8") as fh:
+                ingest = json.load(fh)
+            queries = ingest_pdf.cited_identifiers(ingest["full_text"],
+                                                   ingest["meta"]["arxiv_id"])
+            cache = bib_cache.BibCache(bib_cache_path or bib_cache.DEFAULT_PATH)
+            prof = {}
+            try:
+                with profiling.measure(prof, "bib"):
+                    entries = fetch_bib.resolve_all(queries, cache=cache)
+            finally:
+                cache.close()
+            with open(bib_path, "w", encoding="utf-8") as fh:
+                json.dump(entries, fh, ensure_ascii=False, indent=2)
+            return [bib_path], {"n_cited": len(entries),
+                                "n_resolved": sum(1 for e in entries if e.get("resolved")),
+                                "n_errors": sum(1 for e in entries if e.get("error")),
+                                "profile": prof["bib"]}
+
+        bib = None
+        if prefetch_bib:
+            last = graph.state["stages"].get("bib") or {}
+            if (last.get("extra") or {}).get("n_errors"):
+                graph.force.add("bib")      # a transient failure is retried, not kept
+            bib = graph.run("bib", {"ingest": ing["outputs"],
+                                    "code": graph.code_digest(fetch_bib.__file__)}, {}, build_bib)
+
+        def build_manifest():
+            with open(ingest_path, encoding="utf-8") as fh:
+                ingest = json.load(fh)
+            with open(figures_path, encoding="utf-8") as fh:
+                figures = json.load(fh)
+            n_fig = sum(1 for f in figures if f["kind"] == "figure")
+            n_tab = sum(1 for f in figures if f["kind"] == "table")
+            n_loc = sum(1 for f in figures if f["figure_bbox"])
+            n_flag = sum(1 for f in figures if not f["figure_bbox"])
+            manifest = {
+                "pdf": pdf,
+                "out_dir": out_dir,
+                "n_pages": ingest["n_pages"],
+                "title": ingest["meta"]["title"],
+                "arxiv_id": ingest["meta"]["arxiv_id"],
+                "n_figures": n_fig,
+                "n_tables": n_tab,
+                "n_localized": n_loc,
+                "n_flagged": n_flag,
+                "n_drawing_paths": det["extra"]["detect_stats"].get("drawing_paths", 0),
+                "detect_stats": det["extra"]["detect_stats"],
+                "crops": crp["extra"]["crops"],
+                "profile": {"download": profile["download"],
+                            **{name: (rec["extra"] or {}).get("profile") for name, rec in
+                               (("ingest", ing), ("detect", det), ("crop", crp), ("bib", bib))
+                               if rec is not None}},
+            }
+            if bib is not None:
+                manifest["bib"] = {k: bib["extra"][k] for k in ("n_cited", "n_resolved",
+                                                                "n_errors")}
+            with open(manifest_path, "w", encoding="utf-8") as fh:
+                json.dump(manifest, fh, ensure_ascii=False, indent=2)
+            return [manifest_path], None
+
+        graph.run("manifest", {"ingest": ing["outputs"], "figures": det["outputs"],
+                               "crops": crp["outputs"], "bib": bib and bib["outputs"],
+                               "code": graph.code_digest(__file__)},
+                  {"pdf": pdf, "out_dir": out_dir}, build_manifest)
+    finally:
+        for doc in opened:
+            doc.close()
+    if report is not None:
+        report.extend(graph.report)
+    with open(manifest_path, encoding="utf-8") as fh:
+        return json.load(fh)
 
 
 def main(argv):
@@ -100,10 +249,34 @@ def main(argv):
     ap.add_argument("source", help="PDF path, arXiv id (1706.03762), or arXiv URL")
     ap.add_argument("--out-dir", help="bundle output dir (default: out/<stem>)")
     ap.add_argument("--dpi", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=1,
+                    help="parallel worker processes for ingest, detect and crop")
+    ap.add_argument("--cache-dir", help="crop cache dir (default: <out-dir>/.cache/crops)")
+    ap.add_argument("--cache-max-mb", type=int, default=crop_cache.DEFAULT_MAX_BYTES >> 20,
+                    help="crop cache size cap; least recently used crops are evicted")
+    ap.add_argument("--no-cache", action="store_true", help="re-render every crop")
+    ap.add_argument("--force-stage", action="append", default=[], choices=STAGES + ("all",),
+                    help="rebuild this stage even if its inputs are unchanged (repeatable)")
+    ap.add_argument("--mirror-dir",
+                    help="shared arXiv PDF mirror, checked before downloading "
+                         f"(default: {pdf_mirror.DEFAULT_MIRROR})")
+    ap.add_argument("--prefetch-bib", action="store_true",
+                    help="resolve every DOI / arXiv id in the reference list into bib.json")
+    ap.add_argument("--bib-cache", help="citation cache for --prefetch-bib "
+                                        "(default: ~/.cache/scholar-slides/bib.sqlite3)")
+    ap.add_argument("--profile", action="store_true",
+                    help="print per-stage wall/CPU time and process peak RSS to stderr "
+                         "(also in manifest.json)")
     args = ap.parse_args(argv)
 
-    m = prepare(args.source, out_dir=args.out_dir, dpi=args.dpi)
+    report = []
+    m = prepare(args.source, out_dir=args.out_dir, dpi=args.dpi, workers=args.workers,
+                cache_dir=args.cache_dir, use_cache=not args.no_cache,
+                cache_max_bytes=args.cache_max_mb << 20, force=args.force_stage, report=report,
+                mirror_dir=args.mirror_dir, prefetch_bib=args.prefetch_bib,
+                bib_cache_path=args.bib_cache)
     print(f"Source bundle -> {m['out_dir']}")
+    print("  stages   : " + ", ".join(f"{name} {status}" for name, status in report))
     print(f"  title    : {m['title']!r}")
     print(f"  pages    : {m['n_pages']}   arXiv: {m['arxiv_id']}")
     print(f"  figures  : {m['n_figures']}    tables: {m['n_tables']} (rebuilt as data downstream)")
@@ -111,6 +284,13 @@ def main(argv):
     if m["n_flagged"]:
         print(f"  FLAGGED  : {m['n_flagged']} asset(s) without a reliable bbox "
               f"-> confirm/crop manually at CKPT-1")
+    if "bib" in m:
+        b = m["bib"]
+        print(f"  citations: {b['n_resolved']}/{b['n_cited']} cited DOIs / arXiv ids resolved "
+              f"-> bib.json" + (f" ({b['n_errors']} network errors)" if b["n_errors"] else ""))
+    if args.profile:
+        profiling.print_profile({k: v for k, v in m["profile"].items() if v})
+        print(f"  drawing paths: {m['n_drawing_paths']}", file=sys.stderr)
     print("Next: read references/ingestion.md, build the typed digest from this bundle, "
           "then run CKPT-1 with the user.")
 
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Wall time, CPU time and peak RSS accounting for the Stage-1 scripts.
+
+`measure(profile, name)` wraps one stage and stores {wall_s, cpu_s, peak_rss_mb,
+rss_growth_mb} under `profile[name]`. CPU time counts this process AND its reaped children,
+so a stage run with `--workers N` reports the pool's work, not just the parent's idle wait.
+`peak_rss_mb` is the PROCESS high-water mark (max of this process and its largest child) at
+the end of the stage, not the stage's own footprint: it is monotone across the stages of one
+run. `rss_growth_mb` is how far the stage raised that mark — 0 for a stage that stayed under
+the peak an earlier stage set, so it attributes new peaks, not every allocation.
+
+`prepare_source` records these per stage in manifest.json; each standalone script prints
+them with `--profile`. No resource module (Windows): both RSS fields are None.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """High-water RSS in MB of this process and its reaped children, or None if unknown."""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def _cpu_s():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+@contextmanager
+def measure(profile, name):
+    """Record wall/CPU seconds and process peak RSS of the wrapped block as `profile[name]`."""
+    wall0, cpu0, rss0 = time.perf_counter(), _cpu_s(), peak_rss_mb()
+    rec = profile[name] = {}
+    try:
+        yield rec
+    finally:
+        rss = peak_rss_mb()
+        rec.update(wall_s=round(time.perf_counter() - wall0, 3),
+                   cpu_s=round(_cpu_s() - cpu0, 3), peak_rss_mb=rss,
+                   rss_growth_mb=None if rss is None else round(rss - rss0, 1))
+
+
+def format_profile(profile):
+    """Human-readable lines for a {stage: {wall_s, cpu_s, peak_rss_mb, rss_growth_mb?,
+    phases?}} profile."""
+    lines = []
+    for name, rec in profile.items():
+        rss, grew = rec.get("peak_rss_mb"), rec.get("rss_growth_mb")
+        lines.append(f"  {name:<10} wall {rec['wall_s']:8.3f}s  cpu {rec['cpu_s']:8.3f}s  "
+                     f"process peak rss {'?' if rss is None else f'{rss:.1f}'} MB"
+                     + ("" if grew is None else f" (+{grew:.1f})"))
+        for phase, secs in (rec.get("phases") or {}).items():
+            lines.append(f"    {phase:<12} {secs:8.3f}s")
+    return lines
+
+
+def print_profile(profile, file=None):
+    """Print `format_profile` to stderr (stdout may carry JSON)."""
+    print("profile:", file=file or sys.stderr)
+    for line in format_profile(profile):
+        print(line, file=file or sys.stderr)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Incremental build bookkeeping for the Stage-1 bundle (ingest -> detect -> crop -> manifest).
+
+Each stage declares its inputs (content hashes: the PDF, upstream artifacts, the code that
+builds it) and its parameters (e.g. crop DPI). After a build, the stage's record — input
+hashes, params, and the hash of every artifact it wrote — is saved to `<bundle>/stages.json`.
+On the next run a stage is FRESH (skipped) when its inputs and params are unchanged and every
+recorded artifact is still on disk with the recorded content; otherwise it rebuilds. A
+`force` set overrides freshness for named stages ("all" forces every stage).
+
+File hashes are memoized by (size, mtime_ns), so a no-op rerun only stats files — it does
+not re-read a 100-page PDF. A stage's code input is `code_digest(module_file)`: the module
+plus every sibling script it imports, transitively, so editing a shared helper (say
+`page_pool`) rebuilds the stages that use it. `StageGraph` is exercised by tests with plain
+callables.
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+
+STATE_FILE = "stages.json"
+
+
+def json_digest(obj) -> str:
+    """Stable SHA-256 of a JSON-serializable value (sorted keys)."""
+    blob = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class StageGraph:
+    def __init__(self, out_dir, force=()):
+        self.out_dir = out_dir
+        self.force = set(force or ())
+        self.path = os.path.join(out_dir, STATE_FILE)
+        self.report = []          # [(stage, "built"|"fresh")] in run order
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                self.state = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            self.state = {}
+        self.state.setdefault("files", {})
+        self.state.setdefault("stages", {})
+
+    def digest(self, path) -> str | None:
+        """Content hash of `path` (None if missing), memoized on (size, mtime_ns)."""
+        from crop_cache import file_sha256
+
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = os.path.abspath(path)
+        memo = self.state["files"].get(key)
+        sig = [st.st_size, st.st_mtime_ns]
+        if memo and memo["sig"] == sig:
+            return memo["sha256"]
+        sha = file_sha256(path)
+        self.state["files"][key] = {"sig": sig, "sha256": sha}
+        return sha
+
+    def _local_imports(self, path):
+        """Top-level names `path` imports (at any depth in the file), memoized with its hash."""
+        memo = self.state["files"][os.path.abspath(path)]
+        if "imports" not in memo:
+            with open(path, encoding="utf-8") as fh:
+                tree = ast.parse(fh.read(), path)
+            names = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(a.name.split(".")[0] for a in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                    names.add(node.module.split(".")[0])
+            memo["imports"] = sorted(names)
+        return memo["imports"]
+
+    def code_digest(self, path) -> str:
+        """Hash of the script `path` and of every sibling module it imports, transitively.
+
+        Only modules found next to `path` count (`<dir>/<name>.py`); the standard library and
+        installed packages are left to the environment.
+        """
+        base = os.path.dirname(os.path.abspath(path))
+        hashes = {}
+        todo = [os.path.abspath(path)]
+        while todo:
+            p = todo.pop()
+            if p in hashes:
+                continue
+            hashes[p] = self.digest(p)
+            if hashes[p] is None:
+                continue
+            for name in self._local_imports(p):
+                dep = os.path.join(base, name + ".py")
+                if dep not in hashes and os.path.exists(dep):
+                    todo.append(dep)
+        return json_digest({os.path.basename(p): sha for p, sha in hashes.items()})
+
+    def _fresh(self, name, key):
+        rec = self.state["stages"].get(name)
+        if rec is None or rec.get("key") != key:
+            return False
+        return all(self.digest(os.path.join(self.out_dir, p)) == sha
+                   for p, sha in rec.get("outputs", {}).items())
+
+    def run(self, name, inputs: dict, params: dict, build):
+        """Run stage `name` unless fresh. `build()` returns (output_paths, extra).
+
+        Returns the stage record: {key, inputs, params, outputs:{path: sha256}, extra}, with
+        output paths relative to the bundle. `extra` is whatever JSON the build wants downstream
+        stages to see without rebuilding it.
+        """
+        key = json_digest({"inputs": inputs, "params": params})
+        if not ({name, "all"} & self.force) and self._fresh(name, key):
+            self.report.append((name, "fresh"))
+            return self.state["stages"][name]
+        outputs, extra = build()
+        rec = {
+            "key": key,
+            "inputs": inputs,
+            "params": params,
+            "outputs": {os.path.relpath(p, self.out_dir): self.digest(p) for p in outputs},
+            "extra": extra,
+        }
+        self.state["stages"][name] = rec
+        self.save()
+        self.report.append((name, "built"))
+        return rec
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.state, fh, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
@@ -9,6 +9,9 @@ The modules that need the fixture declare a module-level ``FIX`` pointing at its
 keys off that, so only genuinely fixture-dependent integration tests skip. Integration tests that
 need only the network (e.g. the live citation resolver) or a prebuilt deck (PPTX parity) are left
 untouched and manage their own availability.
+
+Shared builders for synthetic test PDFs live here as fixtures, so test modules never import
+each other.
 """
 import os
 
@@ -31,3 +34,67 @@ def pytest_runtest_setup(item):
     fix = getattr(item.module, "FIX", None)
     if fix and not os.path.exists(fix):
         pytest.skip(_GUIDANCE)
+
+
+def _vector_figure_pdf(path):
+    """One-page PDF: a 2x2-panel vector figure with panel labels and a caption below."""
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=791)
+    for i, (x, y) in enumerate([(60, 100), (300, 100), (60, 260), (300, 260)]):
+        page.draw_rect(fitz.Rect(x, y, x + 230, y + 150), color=(0, 0, 1), fill=(0.8, 0.9, 1))
+        page.draw_circle((x + 115, y + 75), 30 + 5 * i, color=(1, 0, 0))
+        page.insert_text((x + 3, y + 12), "abcd"[i], fontsize=11)
+    page.insert_text((60, 430), "Figure 1: four panels.", fontsize=9)
+    doc.save(path)
+    return {"id": "figure-1", "page": 1, "figure_bbox": [60, 100, 530, 410],
+            "caption_bbox": [60, 421, 200, 432],
+            "panels": [{"label": ch, "bbox": [x, y, x + 230, y + 150]} for ch, (x, y)
+                       in zip("abcd", [(60, 100), (300, 100), (60, 260), (300, 260)])]}
+
+
+@pytest.fixture
+def vector_figure_pdf():
+    """Builder `(path) -> inventory record` for the 2x2-panel vector figure PDF."""
+    return _vector_figure_pdf
+
+
+def _multi_page_pdf(path):
+    """Six-page PDF: figures on pages 1, 3 and 6, a table on page 3, body-only pages 2 and 4,
+    and on page 5 a bare "Figure 2" caption repeated without a figure (dropped by dedup)."""
+    import fitz
+
+    doc = fitz.open()
+
+    def page(lines=0):
+        p = doc.new_page(width=595, height=791)
+        for k in range(lines):
+            p.insert_text((60, 80 + 14 * k), f"Body text line {k} on page {p.number + 1}.",
+                          fontsize=10)
+        return p
+
+    def figure(p, y, caption, panels=2):
+        for i in range(panels):
+            x = 60 + 240 * i
+            p.draw_rect(fitz.Rect(x, y, x + 220, y + 140), color=(0, 0, 1), fill=(0.8, 0.9, 1))
+            p.draw_circle((x + 110, y + 70), 25 + 5 * i, color=(1, 0, 0))
+        p.insert_text((60, y + 160), caption, fontsize=9)
+
+    figure(page(6), 200, "Figure 1: two panels of results.")
+    page(20)
+    p = page()
+    figure(p, 80, "Figure 2: an overview.")
+    p.insert_text((60, 420), "Table 1: scores per model.", fontsize=9)
+    for r in range(4):
+        p.insert_text((60, 440 + 14 * r), f"model{r}    {r}.0    {r}.5", fontsize=9)
+    page(20)
+    page(6).insert_text((60, 300), "Figure 2: an overview, continued from page 3.", fontsize=9)
+    figure(page(), 120, "Figure 3: ablation.", panels=1)
+    doc.save(path)
+
+
+@pytest.fixture
+def multi_page_pdf():
+    """Builder `(path) -> None` for the six-page figures/tables PDF."""
+    return _multi_page_pdf
@@ -0,0 +1,54 @@
+"""Tests for the persistent SQLite citation cache (TTLs, error handling, concurrent writers)."""
+import multiprocessing
+
+import bib_cache as bc
+
+ENTRY = {"key": "vaswani2017", "title": "Attention Is All You Need", "resolved": True}
+
+
+def test_roundtrip_and_ttl_expiry(tmp_path):
+    cache = bc.BibCache(str(tmp_path / "bib.sqlite3"), ttl=100, negative_ttl=10)
+    cache.put("arxiv", "1706.03762", ENTRY, now=1000)
+    assert cache.get("arxiv", "1706.03762", now=1099) == ENTRY
+    assert cache.get("arxiv", "1706.03762", now=1100) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_negative_results_use_shorter_ttl(tmp_path):
+    cache = bc.BibCache(str(tmp_path / "bib.sqlite3"), ttl=100, negative_ttl=10)
+    cache.put("title", "no such paper", {"resolved": False, "query": "No such paper"}, now=0)
+    assert cache.get("title", "no such paper", now=9)["resolved"] is False
+    assert cache.get("title", "no such paper", now=10) is None
+
+
+def test_errors_are_not_cached(tmp_path):
+    cache = bc.BibCache(str(tmp_path / "bib.sqlite3"))
+    cache.put("doi", "10.1/x", {"resolved": False, "query": "10.1/x", "error": "timeout"})
+    assert cache.get("doi", "10.1/x") is None
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "bib.sqlite3")
+    bc.BibCache(path).put("arxiv", "1706.03762", ENTRY)
+    assert bc.BibCache(path).get("arxiv", "1706.03762") == ENTRY
+
+
+def _writer(path, worker):
+    cache = bc.BibCache(path)
+    for i in range(50):
+        cache.put("arxiv", f"{worker}.{i}", {**ENTRY, "key": f"k{worker}-{i}"})
+    cache.close()
+
+
+def test_concurrent_writers_from_several_processes(tmp_path):
+    path = str(tmp_path / "bib.sqlite3")
+    bc.BibCache(path).close()
+    procs = [multiprocessing.Process(target=_writer, args=(path, w)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert all(p.exitcode == 0 for p in procs)
+    cache = bc.BibCache(path)
+    assert all(cache.get("arxiv", f"{w}.{i}")["key"] == f"k{w}-{i}"
+               for w in range(4) for i in range(50))
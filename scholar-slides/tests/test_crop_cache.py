@@ -0,0 +1,126 @@
+"""Unit tests for the content-addressed crop cache (key derivation, hits, LRU eviction)."""
+import os
+import time
+
+import crop_cache as cc
+import crop_figure as cf
+
+
+class TestCacheKey:
+    def test_clip_rounding_absorbs_float_noise(self):
+        a = cc.cache_key("h", 3, (10.0, 20.0, 30.0, 40.0), 300)
+        b = cc.cache_key("h", 3, (10.0000001, 19.9999999, 30.0, 40.0), 300)
+        assert a == b
+
+    def test_every_component_changes_the_key(self):
+        base = cc.cache_key("h", 3, (10, 20, 30, 40), 300, "png")
+        assert base != cc.cache_key("h2", 3, (10, 20, 30, 40), 300, "png")
+        assert base != cc.cache_key("h", 4, (10, 20, 30, 40), 300, "png")
+        assert base != cc.cache_key("h", 3, (10, 20, 30, 41), 300, "png")
+        assert base != cc.cache_key("h", 3, (10, 20, 30, 40), 200, "png")
+        assert base != cc.cache_key("h", 3, (10, 20, 30, 40), 300, "jpg")
+
+
+class TestCropCache:
+    def write(self, path, data):
+        with open(path, "wb") as fh:
+            fh.write(data)
+
+    def test_store_then_fetch(self, tmp_path):
+        cache = cc.CropCache(str(tmp_path / "cache"))
+        src, dest = str(tmp_path / "src.png"), str(tmp_path / "dest.png")
+        self.write(src, b"pixels")
+        assert not cache.fetch("ab" * 32, dest)
+        cache.store("ab" * 32, src)
+        assert cache.fetch("ab" * 32, dest)
+        assert open(dest, "rb").read() == b"pixels"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_store_links_the_crop_and_falls_back_to_a_copy(self, tmp_path, monkeypatch):
+        cache = cc.CropCache(str(tmp_path / "cache"))
+        src = str(tmp_path / "src.png")
+        self.write(src, b"pixels")
+        cache.store("ab" * 32, src)
+        assert os.path.samefile(src, cache._path("ab" * 32))
+
+        def no_link(a, b):
+            raise OSError("cross-device link")
+
+        monkeypatch.setattr(os, "link", no_link)
+        cache.store("cd" * 32, src)
+        assert not os.path.samefile(src, cache._path("cd" * 32))
+        assert open(cache._path("cd" * 32), "rb").read() == b"pixels"
+
+    def test_overwriting_a_placed_file_never_corrupts_the_cache(self, tmp_path):
+        cache = cc.CropCache(str(tmp_path / "cache"))
+        src, dest = str(tmp_path / "src.png"), str(tmp_path / "dest.png")
+        self.write(src, b"v1")
+        cache.store("cd" * 32, src)
+        cache.fetch("cd" * 32, dest)       # dest may now be a hardlink to the entry
+        cc.place(src, dest)                # re-placing unlinks first
+        self.write(str(tmp_path / "other.png"), b"v2")
+        cc.place(str(tmp_path / "other.png"), dest)
+        cache.fetch("cd" * 32, str(tmp_path / "again.png"))
+        assert open(str(tmp_path / "again.png"), "rb").read() == b"v1"
+
+    def test_evicts_least_recently_used_first(self, tmp_path):
+        cache = cc.CropCache(str(tmp_path / "cache"), max_bytes=250)
+        for i, key in enumerate(["aa" * 32, "bb" * 32, "cc" * 32]):
+            src = str(tmp_path / f"src{i}.png")     # distinct crops: stored entries are links
+            self.write(src, b"x" * 100)
+            cache.store(key, src)
+            os.utime(cache._path(key), (time.time() - 100 + i, time.time() - 100 + i))
+        cache.fetch("aa" * 32, str(tmp_path / "hit.png"))   # aa becomes most recent
+        cache.evict()
+        assert os.path.exists(cache._path("aa" * 32))
+        assert not os.path.exists(cache._path("bb" * 32))   # oldest untouched entry goes
+        assert os.path.exists(cache._path("cc" * 32))
+
+
+def test_inventory_second_run_is_served_from_cache(tmp_path, monkeypatch, vector_figure_pdf):
+    pdf = str(tmp_path / "fig.pdf")
+    rec = vector_figure_pdf(pdf)
+    cache = cc.CropCache(str(tmp_path / "cache"))
+    first = cf.crop_from_inventory(pdf, [rec], str(tmp_path / "a"), dpi=150, panels=True,
+                                   cache=cache)
+    assert cache.misses == 5 and cache.hits == 0
+
+    def no_render(doc, jobs):
+        assert jobs == [], "a cache hit must not rasterize"
+        return []
+
+    monkeypatch.setattr(cf, "crop_jobs", no_render)
+    second = cf.crop_from_inventory(pdf, [rec], str(tmp_path / "b"), dpi=150, panels=True,
+                                    cache=cache)
+    assert cache.hits == 5
+    for a, b in zip(first, second):
+        assert open(a["path"], "rb").read() == open(b["path"], "rb").read()
+
+
+def test_rerendering_a_stored_crop_leaves_the_cache_entry_intact(tmp_path, vector_figure_pdf):
+    pdf = str(tmp_path / "fig.pdf")
+    rec = vector_figure_pdf(pdf)
+    cache = cc.CropCache(str(tmp_path / "cache"))
+    (got,) = cf.crop_from_inventory(pdf, [rec], str(tmp_path / "a"), dpi=72, cache=cache)
+    stored = open(got["path"], "rb").read()
+    cf.crop_from_inventory(pdf, [rec], str(tmp_path / "a"), dpi=150)     # no cache
+    assert open(got["path"], "rb").read() != stored
+    cache.fetch(cc.cache_key(cc.file_sha256(pdf), 1, cf.figure_clip(rec, (0, 0, 595, 791)), 72),
+                str(tmp_path / "again.png"))
+    assert open(str(tmp_path / "again.png"), "rb").read() == stored
+
+
+def test_precomputed_pdf_hash_skips_rehashing(tmp_path, monkeypatch, vector_figure_pdf):
+    pdf = str(tmp_path / "fig.pdf")
+    rec = vector_figure_pdf(pdf)
+    pdf_hash = cc.file_sha256(pdf)
+    cache = cc.CropCache(str(tmp_path / "cache"))
+    cf.crop_from_inventory(pdf, [rec], str(tmp_path / "a"), dpi=72, cache=cache)
+
+    def no_hash(path, chunk=1 << 20):
+        raise AssertionError("PDF re-hashed")
+
+    monkeypatch.setattr(cc, "file_sha256", no_hash)
+    cf.crop_from_inventory(pdf, [rec], str(tmp_path / "b"), dpi=72, cache=cache,
+                           pdf_hash=pdf_hash)
+    assert cache.hits == 1
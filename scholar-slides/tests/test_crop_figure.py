@@ -65,6 +65,77 @@ class TestPanelBbox:
         assert cf.panel_bbox({"id": "x", "panels": []}, "a") is None
 
 
+class TestCropJobs:
+    """Page-grouped crop engine: one rasterization per (page, dpi), crops cut by pixel slicing."""
+
+    def test_slices_match_individual_renders(self, tmp_path, vector_figure_pdf):
+        import fitz
+
+        pdf = str(tmp_path / "fig.pdf")
+        rec = vector_figure_pdf(pdf)
+        clips = [tuple(rec["figure_bbox"])] + [cf.pad_and_clamp(p["bbox"], (0, 0, 595, 791), 1.0)
+                                               for p in rec["panels"]]
+        jobs = [(1, c, dpi, str(tmp_path / f"{k}-{dpi}.png"))
+                for k, c in enumerate(clips) for dpi in (150, 300)]
+        doc = fitz.open(pdf)
+        try:
+            cf.crop_jobs(doc, jobs)
+            for _, clip, dpi, out in jobs:
+                z = dpi / 72.0
+                ref = doc[0].get_pixmap(matrix=fitz.Matrix(z, z), clip=fitz.Rect(*clip))
+                got = fitz.Pixmap(out)
+                assert (got.width, got.height) == (ref.width, ref.height)
+                assert got.samples == ref.samples
+        finally:
+            doc.close()
+
+    def test_inventory_crops_panels_on_request(self, tmp_path, vector_figure_pdf):
+        pdf = str(tmp_path / "fig.pdf")
+        rec = vector_figure_pdf(pdf)
+        figures = [rec, {"id": "table-1", "page": 1, "figure_bbox": None}]
+        res = cf.crop_from_inventory(pdf, figures, str(tmp_path / "out"), dpi=150, panels=True)
+        assert [r["id"] for r in res] == ["figure-1", "figure-1-a", "figure-1-b", "figure-1-c",
+                                          "figure-1-d", "table-1"]
+        assert res[-1]["status"] == "skipped-no-bbox"
+        assert all(os.path.getsize(r["path"]) > 0 for r in res[:-1])
+        plain = cf.crop_from_inventory(pdf, figures, str(tmp_path / "plain"), dpi=150)
+        assert [r["id"] for r in plain] == ["figure-1", "table-1"]
+
+    def test_worker_pool_matches_serial(self, tmp_path, vector_figure_pdf):
+        import fitz
+
+        pdf = str(tmp_path / "fig.pdf")
+        rec = vector_figure_pdf(pdf)
+        doc = fitz.open(pdf)
+        doc.fullcopy_page(0)   # same figure again on page 2, so there are two page batches
+        pdf2 = str(tmp_path / "fig2.pdf")
+        doc.save(pdf2)
+        doc.close()
+        figures = [rec, {**rec, "id": "figure-2", "page": 2}]
+        serial = cf.crop_from_inventory(pdf2, figures, str(tmp_path / "s"), dpi=150, panels=True)
+        pooled = cf.crop_from_inventory(pdf2, figures, str(tmp_path / "p"), dpi=150, panels=True,
+                                        workers=2)
+        assert [r["id"] for r in pooled] == [r["id"] for r in serial]
+        for a, b in zip(serial, pooled):
+            with open(a["path"], "rb") as fa, open(b["path"], "rb") as fb:
+                assert fa.read() == fb.read()
+
+    def test_shared_document_is_used_and_left_open(self, tmp_path, vector_figure_pdf):
+        import fitz
+
+        pdf = str(tmp_path / "fig.pdf")
+        rec = vector_figure_pdf(pdf)
+        by_path = cf.crop_from_inventory(pdf, [rec], str(tmp_path / "a"), dpi=150)
+        doc = fitz.open(pdf)
+        try:
+            shared = cf.crop_from_inventory(doc, [rec], str(tmp_path / "b"), dpi=150)
+            assert not doc.is_closed
+        finally:
+            doc.close()
+        with open(by_path[0]["path"], "rb") as fa, open(shared[0]["path"], "rb") as fb:
+            assert fa.read() == fb.read()
+
+
 @pytest.mark.integration
 class TestCrop:
     def test_crop_creates_nonempty_png(self, tmp_path):
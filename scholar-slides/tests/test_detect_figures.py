@@ -108,6 +108,75 @@ class TestAssociate:
         # union should span both panels
         assert bbox[1] <= 100 + 1 and bbox[3] >= 590 - 1
 
+    def test_clusters_thousands_of_marker_rects(self):
+        # a scatter plot drawn as 60x40 tiny overlapping marker paths (2400 rects) under a
+        # full-width caption; the body paragraph far above is beyond merge_gap and stays out
+        cap = (50, 600, 500, 615)
+        markers = [(60 + 2 * i, 200 + 9 * j, 63 + 2 * i, 203 + 9 * j)
+                   for i in range(60) for j in range(40)]
+        body = (60, 20, 500, 40)
+        bbox = df.associate_caption_with_figure(cap, [body] + markers, self.PAGE,
+                                                "figure", merge_gap_frac=0.02)
+        assert bbox == (60, 200, 181, 554)
+
+    @staticmethod
+    def rescan_associate(caption_bbox, rects, page_rect, kind, merge_gap_frac):
+        """Reference: the original associate loop (seed, then rescan the side until stable)."""
+        side = []
+        for r in rects:
+            if df._overlap_x(caption_bbox, r) <= 0:
+                continue
+            if kind == "figure" and r[3] <= caption_bbox[1] + 2:
+                side.append((caption_bbox[1] - r[3], r))
+            elif kind == "table" and r[1] >= caption_bbox[3] - 2:
+                side.append((r[1] - caption_bbox[3], r))
+        if not side:
+            return None
+        side.sort(key=lambda t: t[0])
+        seed_gap, seed = side[0]
+        if seed_gap > 0.5 * (page_rect[3] - page_rect[1]):
+            return None
+        merge_gap = merge_gap_frac * (page_rect[3] - page_rect[1])
+        cluster = [seed]
+        changed = True
+        while changed:
+            changed = False
+            cspan = (min(r[0] for r in cluster), min(r[1] for r in cluster),
+                     max(r[2] for r in cluster), max(r[3] for r in cluster))
+            for _, r in side:
+                if any(r is cr or r == cr for cr in cluster):
+                    continue
+                if df._overlap_x(cspan, r) <= 0:
+                    continue
+                if max(cspan[1], r[1]) - min(cspan[3], r[3]) <= merge_gap:
+                    cluster.append(r)
+                    changed = True
+        return (min(r[0] for r in cluster), min(r[1] for r in cluster),
+                max(r[2] for r in cluster), max(r[3] for r in cluster))
+
+    def test_closure_clustering_matches_rescan(self):
+        import random
+
+        rng = random.Random(5)
+
+        def v(a, b):  # coarse grid so rects share edges and touch exactly at the gap
+            return round(rng.uniform(a, b) / step) * step
+
+        for _ in range(3000):
+            step = rng.choice([5, 1, 0.1])
+            rects = []
+            for _ in range(rng.randint(0, 40)):
+                x, y = v(0, 560), v(0, 780)
+                rects.append((x, y, x + v(-5, 200), y + v(-5, 100)))  # incl. degenerate rects
+            rects += rng.sample(rects, min(3, len(rects)))              # and duplicates
+            x, y = v(0, 400), v(50, 740)
+            cap = (x, y, x + v(10, 200), y + 12)
+            kind = rng.choice(["figure", "table"])
+            frac = rng.choice([0.0, 0.01, 0.10])
+            assert df.associate_caption_with_figure(cap, rects, self.PAGE, kind,
+                                                    merge_gap_frac=frac) == \
+                self.rescan_associate(cap, rects, self.PAGE, kind, frac)
+
 
 class TestGrowRegion:
     """Region-growing localizer over ALL content (text+vector+image)."""
@@ -138,6 +207,43 @@ class TestGrowRegion:
     def test_returns_none_when_no_content(self):
         assert df.grow_figure_region((60, 600, 500, 615), [], self.PAGE, "figure") is None
 
+    @staticmethod
+    def rescan_closure(region, pool, gap):
+        """Reference: the original rescan-until-stable flood the indexed grower replaced."""
+        pool = list(pool)
+        changed = True
+        while changed:
+            changed = False
+            for r in list(pool):
+                if min(region[2], r[2]) - max(region[0], r[0]) <= 0:
+                    continue
+                if max(region[1], r[1]) - min(region[3], r[3]) <= gap:
+                    region = [min(region[0], r[0]), min(region[1], r[1]),
+                              max(region[2], r[2]), max(region[3], r[3])]
+                    pool.remove(r)
+                    changed = True
+        return region
+
+    def test_indexed_closure_matches_rescan(self):
+        import random
+
+        rng = random.Random(4)
+
+        def v(a, b):  # coarse grid so rects share edges and touch exactly at the gap
+            return round(rng.uniform(a, b) / step) * step
+
+        for _ in range(3000):
+            step = rng.choice([5, 1, 0.1])
+            rects = []
+            for _ in range(rng.randint(0, 40)):
+                x, y = v(0, 560), v(0, 720)
+                rects.append((x, y, x + v(-5, 200), y + v(-5, 100)))  # incl. degenerate rects
+            rects += rng.sample(rects, min(3, len(rects)))              # and duplicates
+            x, y = v(0, 500), v(50, 700)
+            region = [x, y, x + v(0, 200), y]
+            gap = rng.choice([0.0, 5.0, 27.36])
+            assert df._grow_closure(region, rects, gap) == self.rescan_closure(region, rects, gap)
+
 
 class TestStripMarginBands:
     """Running head / running foot (page furniture) must be dropped before growing, so a
@@ -180,6 +286,62 @@ class TestStripMarginBands:
         assert bbox[1] >= 47   # top is below the ~6% header band; header not included
 
 
+class TestMergeDrawingRects:
+    """Vector paths (plot markers, glyph outlines) are pre-clustered before region growing so a
+    plot-dense page hands the grower a few cluster rects instead of thousands of paths."""
+
+    def test_merges_touching_markers_into_one_cluster(self):
+        markers = [(100 + 4 * i, 200, 103 + 4 * i, 203) for i in range(50)]  # 1pt apart
+        assert df.merge_drawing_rects(markers, tol=3.0) == [(100, 200, 299, 203)]
+
+    def test_keeps_distant_groups_apart(self):
+        plot_a = [(50, 50, 60, 60), (62, 50, 70, 60)]
+        plot_b = [(300, 50, 310, 60)]
+        got = df.merge_drawing_rects(plot_a + plot_b, tol=3.0)
+        assert got == [(50, 50, 70, 60), (300, 50, 310, 60)]
+
+    def test_gap_beyond_tolerance_is_not_bridged(self):
+        rects = [(0, 0, 10, 10), (14, 0, 24, 10)]   # 4pt gap
+        assert df.merge_drawing_rects(rects, tol=3.0) == rects
+        assert df.merge_drawing_rects(rects, tol=4.0) == [(0, 0, 24, 10)]
+
+    def test_chain_spanning_grid_cells_is_one_cluster(self):
+        chain = [(0, 10 * i, 5, 10 * i + 9) for i in range(30)]   # vertical chain, 1pt gaps
+        assert df.merge_drawing_rects(chain, tol=1.5, cell=8.0) == [(0, 0, 5, 299)]
+
+    def test_negative_tolerance_disables(self):
+        rects = [(0, 0, 10, 10), (5, 5, 15, 15)]
+        assert df.merge_drawing_rects(rects, tol=-1) == rects
+
+    def test_dense_cell_of_overlapping_markers(self):
+        import random
+
+        rng = random.Random(7)
+        pts = [(rng.uniform(100, 130), rng.uniform(100, 130)) for _ in range(5000)]
+        got = df.merge_drawing_rects([(x, y, x + 1, y + 1) for x, y in pts], tol=3.0)
+        assert len(got) == 1
+
+    def test_clusters_lie_inside_pymupdf_cluster_drawings(self):
+        # Page.cluster_drawings also absorbs paths touching a cluster's growing bbox, so it
+        # may join more; it must never split one of ours.
+        import random
+
+        import fitz
+
+        rng = random.Random(3)
+        doc = fitz.open()
+        page = doc.new_page(width=560, height=720)
+        for _ in range(400):
+            x, y, s = rng.uniform(50, 500), rng.uniform(50, 650), rng.uniform(1, 6)
+            page.draw_rect(fitz.Rect(x, y, x + s, y + s), color=(0, 0, 0), fill=(0, 0, 0))
+        drawings = page.get_drawings()
+        ours = df.merge_drawing_rects([tuple(d["rect"]) for d in drawings], tol=3.0)
+        theirs = page.cluster_drawings(drawings=drawings, x_tolerance=3, y_tolerance=3,
+                                       final_filter=False)
+        assert len(ours) >= len(theirs) > 100
+        assert all(any(fitz.Rect(c) in t for t in theirs) for c in ours)
+
+
 class TestDetectPanels:
     """Sub-panel localization for multi-panel figures, so the spec can show ONE panel enlarged
     instead of an illegible a–f grid. Panel labels are a distinct bold display font at each
@@ -244,3 +406,67 @@ class TestMinFontInBbox:
     def test_returns_none_for_textless_figures(self):
         assert df.min_font_in_bbox([], self.FIG) is None
         assert df.min_font_in_bbox([self.span(7.0)], None) is None
+
+
+class TestPageLayout:
+    """Every per-page extractor derives from ONE `get_text("dict")` call (the dominant cost)."""
+
+    class FakePage:
+        class R:
+            x0, y0, x1, y1, width = 0, 0, 560, 720, 560
+
+        rect = R()
+
+        def __init__(self):
+            self.dict_calls = 0
+            self.geometry_calls = 0
+
+        def get_text(self, kind, flags=None):
+            assert kind == "dict"
+            self.dict_calls += 1
+            return {"blocks": [
+                {"type": 0, "bbox": (60, 100, 500, 300), "lines": [{"spans": [
+                    {"text": "a", "bbox": (62, 102, 68, 111), "font": "Black", "size": 9.0},
+                    {"text": "plot label", "bbox": (80, 102, 140, 109), "font": "Reg", "size": 6.5},
+                ]}]},
+                {"type": 1, "bbox": (60, 320, 500, 500)},   # image block: not a text block
+                {"type": 0, "bbox": (60, 600, 500, 620), "lines": [{"spans": [
+                    {"text": "Figure 1: caption.", "bbox": (60, 600, 200, 610), "font": "Reg", "size": 9.0},
+                ]}]},
+            ]}
+
+        def get_image_info(self, xrefs=False):
+            self.geometry_calls += 1
+            return []
+
+        def get_drawings(self):
+            self.geometry_calls += 1
+            return []
+
+    def test_single_dict_extraction_feeds_all_views(self):
+        page = self.FakePage()
+        layout = df.PageLayout(page)
+        blocks = layout.text_blocks()
+        letters = layout.letter_spans()
+        sized = layout.sized_spans()
+        rects = layout.content_rects()
+        assert page.dict_calls == 1
+        assert [b["text"] for b in blocks] == ["a plot label", "Figure 1: caption."]
+        assert [s["text"] for s in letters] == ["a"]
+        assert sorted(s["size"] for s in sized) == [6.5, 9.0, 9.0]
+        assert rects == [(60, 100, 500, 300), (60, 600, 500, 620)]
+
+    class BodyPage(FakePage):
+        def get_text(self, kind, flags=None):
+            self.dict_calls += 1
+            return {"blocks": [{"type": 0, "bbox": (60, 100, 500, 300), "lines": [{"spans": [
+                {"text": "As shown in Figure 1, body text.", "bbox": (60, 100, 500, 110),
+                 "font": "Reg", "size": 9.0}]}]}]}
+
+    def test_caption_less_pages_skip_geometry(self):
+        doc = [self.BodyPage(), self.FakePage(), self.BodyPage()]
+        pages = df._detect_pages(doc, 0, 3)
+        assert [p["stats"].get("pages_skipped", 0) for p in pages] == [1, 0, 1]
+        assert [pg.geometry_calls for pg in doc] == [0, 2, 0]
+        assert [pg.dict_calls for pg in doc] == [1, 1, 1]
+        assert [f["id"] for p in pages for f in p["records"]] == ["figure-1"]
@@ -1,4 +1,10 @@
 """Unit + (live) integration tests for the citation resolver."""
+import http.server
+import json
+import threading
+import time
+import urllib.parse
+
 import fetch_bib as fb
 import pytest
 
@@ -26,6 +32,90 @@ def test_title_match_guards_wrong_crossref_hit():
     assert not fb.title_match("Attention", "Attention Is All You Need")
 
 
+def test_match_titles_keeps_title_match_decisions():
+    cands = ["Attention is All you Need", "Is Attention All You Need?",
+             "From Human Attention to Computational Attention", "", "Attention Is All You Need."]
+    assert fb.match_titles("Attention Is All You Need", cands) == [0, 4]
+    assert fb.match_titles("", cands) == []
+
+
+def _cand(title, year="2017", authors=("Ashish Vaswani",)):
+    return fb.make_entry(title, list(authors), year, None, None, None, "crossref")
+
+
+class TestRankCandidates:
+    def test_unverified_candidates_are_dropped(self):
+        got = fb.rank_candidates("Attention Is All You Need",
+                                 [_cand("Is Attention All You Need?"), _cand("Attention")])
+        assert got == []
+
+    def test_exact_title_beats_a_subtitle_extension(self):
+        sub = _cand("Attention Is All You Need: A Survey")
+        exact = _cand("Attention is all you need")
+        assert fb.rank_candidates("Attention Is All You Need", [sub, exact])[0] is exact
+
+    def test_year_and_author_hints_break_ties(self):
+        reprint = _cand("Attention Is All You Need", "2023", ["Somebody Else"])
+        original = _cand("Attention Is All You Need", "2018", ["A. Vaswani"])
+        title = "Attention Is All You Need"
+        assert fb.rank_candidates(title, [reprint, original])[0] is reprint   # relevance order
+        assert fb.rank_candidates(title, [reprint, original], year=2017)[0] is original
+        assert fb.rank_candidates(title, [reprint, original], authors="Vaswani")[0] is original
+
+    def test_year_hint_and_entry_years_are_parsed_defensively(self):
+        a = _cand("Attention Is All You Need", "n.d.")
+        b = _cand("Attention Is All You Need", "2017a")
+        title = "Attention Is All You Need"
+        assert fb.rank_candidates(title, [a, b], year="2017b")[0] is b
+        assert fb.rank_candidates(title, [a, b], year="in press") == [a, b]
+
+    def test_split_query(self):
+        assert fb.split_query("1706.03762") == ("1706.03762", {})
+        assert fb.split_query({"title": "T", "year": 2017, "author": "Vaswani"}) == (
+            "T", {"year": 2017, "authors": "Vaswani"})
+
+
+def _perturbed(rng, words, title):
+    r = rng.random()
+    if r < 0.35:                                  # a few character edits
+        cs = list(title)
+        for _ in range(rng.randint(1, 3)):
+            j = rng.randrange(len(cs))
+            op = rng.random()
+            if op < 0.33:
+                cs[j] = rng.choice("abcdefghij ")
+            elif op < 0.66 and len(cs) > 1:
+                del cs[j]
+            else:
+                cs.insert(j, rng.choice("abcdefghij"))
+        return "".join(cs)
+    if r < 0.5:                                   # same words, different order
+        w = title.split()
+        rng.shuffle(w)
+        return " ".join(w)
+    if r < 0.65:                                  # subtitle extension
+        return title + ": " + " ".join(rng.choices(words, k=3))
+    if r < 0.75:                                  # casing / punctuation only
+        return title.upper() + "?"
+    return " ".join(rng.choices(words, k=rng.randint(2, 45)))   # unrelated (some > 200 chars)
+
+
+def test_match_titles_equals_title_match_on_random_corpus():
+    import random
+
+    rng = random.Random(0)
+    words = ("attention is all you need deep residual learning for image recognition language "
+             "models are few shot learners graph neural networks scalable training").split()
+    n_accepted = 0
+    for _ in range(300):
+        query = " ".join(rng.choices(words, k=rng.choice([rng.randint(2, 12), 45])))
+        cands = [_perturbed(rng, words, query) for _ in range(40)]
+        expected = [i for i, c in enumerate(cands) if fb.title_match(query, c)]
+        assert fb.match_titles(query, cands) == expected, query
+        n_accepted += len(expected)
+    assert 0.2 < n_accepted / (300 * 40) < 0.8   # the corpus exercises both outcomes
+
+
 def test_make_key():
     assert fb.make_key(["Ashish Vaswani", "Noam Shazeer"], "2017") == "vaswani2017"
     assert fb.make_key([], None) == "anon"
@@ -67,6 +157,292 @@ def test_parse_arxiv_atom():
     assert e["key"] == "vaswani2017" and e["title"] == "Attention Is All You Need"
 
 
+def test_cache_key_normalizes_doi_case_and_title_punctuation():
+    assert fb.cache_key("doi", "10.1145/ABC.1") == ("doi", "10.1145/abc.1")
+    assert fb.cache_key("title", "Attention Is All You Need!") == \
+        fb.cache_key("title", "attention is  all you need")
+
+
+def test_cache_key_includes_title_hints():
+    bare = fb.cache_key("title", "Attention Is All You Need")
+    hinted = fb.cache_key("title", "Attention Is All You Need",
+                          {"year": "2017", "authors": ["Noam Shazeer", "A. Vaswani"]})
+    assert hinted != bare
+    assert hinted == fb.cache_key("title", "attention is all you need.",
+                                  {"year": 2017, "authors": ["vaswani", "Shazeer"]})
+    assert fb.cache_key("title", "T", {"year": "n.d."}) == fb.cache_key("title", "T")
+
+
+class TestCachedResolve:
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        calls = []
+
+        def fake_arxiv(arxiv_id):
+            calls.append(arxiv_id)
+            return fb.make_entry("Attention Is All You Need", ["Ashish Vaswani"], "2017", None,
+                             None, arxiv_id, "arxiv")
+
+        def fake_title(title, year=None, authors=None):
+            calls.append(title)
+            return None
+
+        monkeypatch.setattr(fb, "fetch_arxiv", fake_arxiv)
+        monkeypatch.setattr(fb, "fetch_crossref_by_title", fake_title)
+        return calls
+
+    def test_second_resolve_is_served_from_cache(self, calls, tmp_path):
+        import bib_cache
+
+        cache = bib_cache.BibCache(str(tmp_path / "bib.sqlite3"))
+        first = fb.resolve("1706.03762", cache=cache)
+        again = fb.resolve("arXiv:1706.03762v5", cache=cache)
+        assert again == first and calls == ["1706.03762"]
+
+    def test_not_found_is_cached_with_query_of_the_caller(self, calls, tmp_path):
+        import bib_cache
+
+        cache = bib_cache.BibCache(str(tmp_path / "bib.sqlite3"))
+        fb.resolve("Some Unknown Paper", cache=cache)
+        got = fb.resolve("some unknown paper.", cache=cache)
+        assert got == {"resolved": False, "query": "some unknown paper."}
+        assert len(calls) == 1
+
+    def test_hinted_title_is_cached_apart_from_the_bare_title(self, calls, tmp_path):
+        import bib_cache
+
+        cache = bib_cache.BibCache(str(tmp_path / "bib.sqlite3"))
+        fb.resolve("Some Unknown Paper", cache=cache)
+        fb.resolve({"title": "Some Unknown Paper", "year": 2017}, cache=cache)
+        fb.resolve({"title": "some unknown paper", "year": "2017"}, cache=cache)
+        assert len(calls) == 2
+
+    def test_offline_and_refresh(self, calls, tmp_path):
+        import bib_cache
+
+        cache = bib_cache.BibCache(str(tmp_path / "bib.sqlite3"))
+        miss = fb.resolve("1706.03762", cache=cache, offline=True)
+        assert miss["resolved"] is False and miss["error"] == "offline" and calls == []
+        fb.resolve("1706.03762", cache=cache)
+        assert fb.resolve("1706.03762", cache=cache, offline=True)["resolved"]
+        fb.resolve("1706.03762", cache=cache, refresh=True)
+        assert calls == ["1706.03762", "1706.03762"]
+
+
+def _atom(*ids):
+    entries = "".join(f"""<entry><id>http://arxiv.org/abs/{i}v1</id>
+        <published>2017-06-12T00:00:00Z</published><title>Paper {i}</title>
+        <author><name>Ada Lovelace</name></author></entry>""" for i in ids)
+    return f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'
+
+
+def _work(doi, title="A Crossref Work"):
+    return {"DOI": doi, "title": [title], "author": [{"given": "Alan", "family": "Turing"}],
+            "issued": {"date-parts": [[1950]]}, "type": "journal-article"}
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    """Local stand-in for export.arxiv.org / api.crossref.org (see `stub` fixture)."""
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        service = "arxiv" if url.path.startswith("/api/") else "crossref"
+        srv = self.server
+        with srv.lock:
+            srv.active[service] += 1
+            srv.peak[service] = max(srv.peak[service], srv.active[service])
+            srv.log.append((service, time.monotonic(), url.path, query))
+            if srv.active["crossref"] > 1:
+                srv.crossref_overlap.set()
+        try:
+            if service == "crossref":
+                # Cleared by a test: the first Crossref request is held until a second one is
+                # in flight, so an overlap is observed whenever the client allows one.
+                srv.crossref_overlap.wait(5)
+            time.sleep(srv.delay)
+            status, body = srv.route(url.path, query)
+        finally:
+            with srv.lock:
+                srv.active[service] -= 1
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _default_route(path, query):
+    if path == "/api/query":
+        return 200, _atom(*query["id_list"].split(","))
+    if path.startswith("/works/"):
+        doi = urllib.parse.unquote(path[len("/works/"):])
+        return (404, "not found") if "missing" in doi else (200, {"message": _work(doi)})
+    if "filter" in query:
+        dois = [f[len("doi:"):] for f in query["filter"].split(",")]
+        return 200, {"message": {"items": [_work(d.upper()) for d in dois
+                                           if "missing" not in d]}}
+    title = query.get("query.bibliographic", "")
+    items = [] if "unknown" in title.lower() else [_work("10.1000/t", title)]
+    return 200, {"message": {"items": items}}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    srv.lock = threading.Lock()
+    srv.active = {"arxiv": 0, "crossref": 0}
+    srv.peak = {"arxiv": 0, "crossref": 0}
+    srv.log = []
+    srv.delay = 0.05
+    srv.crossref_overlap = threading.Event()
+    srv.crossref_overlap.set()
+    srv.route = _default_route
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    monkeypatch.setattr(fb, "ARXIV_API", base + "/api/query")
+    monkeypatch.setattr(fb, "CROSSREF_API", base + "/works")
+    monkeypatch.setitem(fb.RATE_LIMITS, "arxiv", fb.RateLimit(1, 0.05))
+    monkeypatch.setitem(fb.RATE_LIMITS, "crossref", fb.RateLimit(3, 0.0))
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_concurrent_resolve_all_keeps_order_and_per_service_limits(stub, monkeypatch):
+    monkeypatch.setattr(fb, "ARXIV_BATCH", 1)      # several arXiv requests to space out
+    stub.crossref_overlap.clear()
+    queries = ["1706.03762", "10.1000/a", "Some Known Title", "2101.00001", "10.1000/missing",
+               "10.1000/b", "An unknown paper", "2101.00002", "Another Known Title",
+               "Third Known Title"]
+    got = fb.resolve_all(queries, workers=8)
+    assert [g.get("resolved") for g in got] == [True, True, True, True, False,
+                                                 True, False, True, True, True]
+    assert got[0]["arxiv"] == "1706.03762" and got[3]["arxiv"] == "2101.00001"
+    assert got[1]["doi"] == "10.1000/A" and got[9]["title"] == "Third Known Title"
+    assert got[4] == {"resolved": False, "query": "10.1000/missing"}
+    assert stub.peak["arxiv"] == 1                 # arXiv: one request at a time...
+    starts = [t for svc, t, _, _ in stub.log if svc == "arxiv"]
+    assert all(b - a >= 0.045 for a, b in zip(starts, starts[1:]))   # ...spaced out
+    assert 1 < stub.peak["crossref"] <= 3          # Crossref overlaps, within its limit
+
+
+def test_serial_and_concurrent_results_agree(stub):
+    queries = ["1706.03762", "10.1000/a", "Some Known Title", "An unknown paper"]
+    assert fb.resolve_all(queries, workers=1) == fb.resolve_all(queries, workers=4)
+
+
+def test_parse_arxiv_feed_reads_every_entry_and_skips_errors():
+    error = ("<entry><id>http://arxiv.org/api/errors#incorrect_id_format_for_x</id>"
+             "<title>Error</title></entry>")
+    xml = _atom("1706.03762", "2101.00001").replace("</feed>", error + "</feed>")
+    got = fb.parse_arxiv_feed(xml)
+    assert [e["arxiv"] for e in got] == ["1706.03762", "2101.00001"]
+    assert fb.parse_arxiv_atom(xml)["arxiv"] == "1706.03762"
+    assert fb.parse_arxiv_atom(_atom().replace("</feed>", error + "</feed>")) is None
+
+
+def test_batched_lookups_take_one_request_per_chunk(stub, monkeypatch):
+    import bib_cache
+
+    monkeypatch.setattr(fb, "CROSSREF_BATCH", 4)
+    ids = [f"2101.{n:05d}" for n in range(50)]
+    dois = [f"10.1000/p{n}" for n in range(6)] + ["10.1000/missing"]
+    queries = ids[:25] + dois + ["arXiv:2101.00003v2"] + ids[25:]
+    cache = bib_cache.BibCache(":memory:")
+    got = fb.resolve_all(queries, cache=cache, workers=4)
+    arxiv_reqs = [q for svc, _, _, q in stub.log if svc == "arxiv"]
+    crossref_reqs = [q for svc, _, _, q in stub.log if svc == "crossref"]
+    assert len(arxiv_reqs) == 1 and arxiv_reqs[0]["max_results"] == "50"
+    assert len(crossref_reqs) == 2                 # 7 DOIs in chunks of 4
+    assert [g["arxiv"] for g in got[:25]] == ids[:25]
+    assert [g["arxiv"] for g in got[33:]] == ids[25:]
+    assert got[32]["arxiv"] == "2101.00003"
+    assert [g["doi"].lower() for g in got[25:31]] == dois[:6]
+    assert got[31] == {"resolved": False, "query": "10.1000/missing"}
+    stub.log.clear()
+    assert fb.resolve_all(queries, cache=cache, offline=True) == got
+    assert stub.log == []
+
+
+def test_title_search_takes_first_verified_of_top_rows(stub):
+    def route(path, query):
+        wrong = [_work("10.1000/w1", "Is Attention All You Need?"),
+                 _work("10.1000/w2", "From Human Attention to Computational Attention")]
+        items = wrong + [_work("10.1000/late", "Attention Is All You Need"),
+                         _work("10.1000/right", "Attention is all you need")]
+        items[3]["issued"] = {"date-parts": [[2017]]}
+        return 200, {"message": {"items": items}}
+
+    stub.route = route
+    got = fb.resolve_all(["Attention Is All You Need",
+                          {"title": "Attention Is All You Need", "year": 2017}])
+    assert [g["doi"] for g in got] == ["10.1000/late", "10.1000/right"]
+    (_, _, _, query), _ = [entry for entry in stub.log if entry[0] == "crossref"]
+    assert query["rows"] == str(fb.CROSSREF_ROWS) and "title" in query["select"].split(",")
+
+
+def test_read_ndjson_queries(tmp_path):
+    path = tmp_path / "q.ndjson"
+    path.write_text('"1706.03762"\n\n{"title": "T", "year": 2017}\nplain title\n',
+                    encoding="utf-8")
+    assert fb.read_ndjson_queries(str(path)) == ["1706.03762", {"title": "T", "year": 2017},
+                                                 "plain title"]
+
+
+def test_answered_queries_drops_torn_line_and_retries_errors(tmp_path):
+    path = tmp_path / "out.ndjson"
+    path.write_bytes(b'{"query": "a", "resolved": true}\n'
+                     b'{"query": "b", "resolved": false}\n'
+                     b'{"query": "c", "resolved": false, "error": "timeout"}\n'
+                     b'{"query": "d", "reso')
+    assert fb.answered_queries(str(path)) == {"title:a", "title:b"}
+    assert path.read_bytes().endswith(b'"timeout"}\n')
+    assert fb.answered_queries(str(tmp_path / "missing.ndjson")) == set()
+
+
+def test_ndjson_out_streams_and_resumes(stub, tmp_path, capsys):
+    out = str(tmp_path / "bib.ndjson")
+    common = ["--no-cache", "--ndjson-out", out, "--workers", "2"]
+    fb.main(["1706.03762", "10.1000/a", "An unknown paper"] + common)
+    with open(out, encoding="utf-8") as fh:
+        lines = [json.loads(ln) for ln in fh]
+    assert sorted(r["query"] for r in lines) == ["10.1000/a", "1706.03762", "An unknown paper"]
+    assert {r["query"]: r["resolved"] for r in lines}["An unknown paper"] is False
+
+    stub.log.clear()
+    fb.main(["1706.03762", "10.1000/a", "An unknown paper", "2101.00001", "--resume"] + common)
+    assert [q for svc, _, _, q in stub.log] == [{"id_list": "2101.00001", "max_results": "1"}]
+    with open(out, encoding="utf-8") as fh:
+        assert len(fh.readlines()) == 4
+    assert "resolved 1/1, 3 already answered" in capsys.readouterr().out
+
+
+def test_resume_keys_on_the_full_query_and_rebuilds_out(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(fb, "STREAM_CHUNK", 2)
+    out, bib = str(tmp_path / "bib.ndjson"), str(tmp_path / "bib.json")
+    queries = tmp_path / "q.ndjson"
+    queries.write_text('"Some Known Title"\n"10.1000/a"\n"An unknown paper"\n', encoding="utf-8")
+    common = ["--no-cache", "--ndjson", str(queries), "--ndjson-out", out, "--out", bib]
+    fb.main(common)
+    with open(queries, "a", encoding="utf-8") as fh:       # same title, now with a hint
+        fh.write('{"title": "Some Known Title", "year": 1950}\n"arXiv:1706.03762v2"\n')
+    stub.log.clear()
+    fb.main(common + ["--resume"])
+    asked = [q.get("query.bibliographic") or q.get("id_list") for _, _, _, q in stub.log]
+    assert sorted(asked) == ["1706.03762", "Some Known Title"]
+    got = json.load(open(bib, encoding="utf-8"))
+    assert [e["resolved"] for e in got] == [True, True, False, True, True]
+    assert [e.get("query") for e in got] == [None, None, "An unknown paper", None, None]
+    assert not any("query_key" in e for e in got)
+    plain = str(tmp_path / "plain.json")            # same queries, no NDJSON output
+    fb.main(["--no-cache", "--ndjson", str(queries), "--out", plain])
+    assert got == json.load(open(plain, encoding="utf-8"))
+
+
 @pytest.mark.integration
 def test_resolve_arxiv_live():
     e = fb.resolve("1706.03762")
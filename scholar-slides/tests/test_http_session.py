@@ -0,0 +1,88 @@
+"""Tests for the shared HTTP session: keep-alive pooling, User-Agent, retry/backoff."""
+import http.server
+import threading
+import time
+
+import pytest
+
+import http_session as hs
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"            # keep-alive
+
+    def do_GET(self):
+        srv = self.server
+        srv.seen.append((self.client_address[1], self.headers.get("User-Agent"), time.monotonic()))
+        status, headers = srv.script.pop(0) if srv.script else (200, {})
+        body = b"ok"
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.seen = []
+    srv.script = []
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.url = f"http://127.0.0.1:{srv.server_address[1]}/x"
+    hs.configure(backoff=0.01, mailto="team@example.org")
+    yield srv
+    hs.configure(backoff=0.5, mailto=hs.MAILTO)
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_connections_are_reused_and_user_agent_carries_mailto(server):
+    for _ in range(5):
+        assert hs.get(server.url).status_code == 200
+    ports = {port for port, _, _ in server.seen}
+    assert len(server.seen) == 5 and len(ports) == 1
+    assert server.seen[0][1] == "scholar-slides/0.1 (mailto:team@example.org)"
+
+
+def test_retries_5xx_then_succeeds(server):
+    server.script = [(503, {}), (502, {})]
+    assert hs.get(server.url).status_code == 200
+    assert len(server.seen) == 3
+
+
+def test_honours_retry_after_on_429(server):
+    server.script = [(429, {"Retry-After": "1"})]
+    t0 = time.monotonic()
+    assert hs.get(server.url).status_code == 200
+    assert time.monotonic() - t0 >= 0.9 and len(server.seen) == 2
+
+
+def test_retry_after_beyond_the_cap_is_returned_not_waited(server):
+    hs.configure(max_retry_after=5)
+    try:
+        server.script = [(429, {"Retry-After": "3600"})]
+        t0 = time.monotonic()
+        assert hs.get(server.url).status_code == 429
+        assert time.monotonic() - t0 < 1 and len(server.seen) == 1
+    finally:
+        hs.configure(max_retry_after=60)
+
+
+def test_gives_up_after_configured_retries(server):
+    hs.configure(retries=1)
+    try:
+        server.script = [(500, {})] * 3
+        assert hs.get(server.url).status_code == 500
+        assert len(server.seen) == 2
+    finally:
+        hs.configure(retries=4)
+
+
+def test_configure_rejects_unknown_settings():
+    with pytest.raises(TypeError):
+        hs.configure(retry=3)
@@ -31,6 +31,31 @@ class TestArxivId:
         assert ing.detect_arxiv_id(stamp, stamp_only=True) == "2602.15763"
 
 
+REFS = """1 Introduction
+We build on arXiv:9999.99999 (cited in the body).
+References
+[1] A. Vaswani et al. Attention is all you need. arXiv preprint arXiv:1706.03762, 2017.
+[2] K. He et al. Deep residual learning. In CVPR (doi:10.1109/CVPR.2016.90).
+[3] J. Devlin et al. BERT. CoRR, abs/1810.04805. https://doi.org/10.48550/arXiv.2006.11239.
+[4] Some chapter. https://doi.org/10.1007/978-3-030-01234-2_1), 2018.
+[5] A. Vaswani et al. arXiv:1706.03762v5; our own preprint arXiv:2602.15763.
+"""
+
+
+class TestCitedIdentifiers:
+    def test_reference_section_is_after_last_heading(self):
+        refs = ing.reference_section(REFS)
+        assert refs.startswith("\n[1]") and "9999.99999" not in refs
+
+    def test_no_heading_uses_whole_text(self):
+        assert ing.reference_section("just arXiv:1706.03762") == "just arXiv:1706.03762"
+
+    def test_ids_and_dois_in_order_deduplicated(self):
+        assert ing.cited_identifiers(REFS, own_arxiv_id="2602.15763") == [
+            "1706.03762", "10.1109/CVPR.2016.90", "1810.04805", "2006.11239",
+            "10.1007/978-3-030-01234-2_1"]
+
+
 @pytest.mark.integration
 class TestExtract:
     def test_extract_structure(self):
@@ -49,3 +74,28 @@ class TestExtract:
     def test_pages_are_one_indexed(self):
         d = ing.extract(FIX)
         assert d["pages"][0]["page"] == 1
+
+
+def _pdf_with_raster():
+    """In-memory one-page PDF: a caption line under an embedded 64x64 raster."""
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=300)
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+    pix.set_rect(pix.irect, (200, 40, 40))
+    page.insert_image(fitz.Rect(50, 50, 250, 200), pixmap=pix)
+    page.insert_text((50, 220), "Figure 1: a raster.", fontsize=9)
+    return doc
+
+
+def test_text_dict_materializes_no_image_payload():
+    # The default dict carries decoded pixel bytes for every raster; layout extraction must
+    # request text-only output (image rects come from get_image_info instead).
+    doc = _pdf_with_raster()
+    page = doc[0]
+    assert any(b.get("type") == 1 for b in page.get_text("dict")["blocks"])  # default: image block
+    blocks = ing.text_dict(page)["blocks"]
+    assert all(b.get("type", 0) == 0 and "image" not in b for b in blocks)
+    assert any("Figure 1" in s["text"] for b in blocks for ln in b["lines"] for s in ln["spans"])
+    assert page.get_image_info(xrefs=False)[0]["bbox"] == (50.0, 50.0, 250.0, 200.0)
@@ -0,0 +1,191 @@
+"""Tests for the offline local-library tier (BibTeX / CSL-JSON / Zotero parsing, index)."""
+import json
+import sqlite3
+
+import fetch_bib as fb
+import local_bib as lb
+
+BIB = r"""
+@string{nips = "NeurIPS"}
+@comment{not an entry}
+@inproceedings{vaswani2017attention,
+  title = {Attention Is {All} You Need},
+  author = {Vaswani, Ashish and Shazeer, Noam and Parmar, Niki},
+  booktitle = "Advances in " # "Neural Information Processing Systems",
+  year = 2017,
+  eprint = {1706.03762v5}, archivePrefix = {arXiv},
+}
+@article(he2016deep,
+  title = "Deep Residual Learning for Image Recognition",
+  author = "Kaiming He and Xiangyu Zhang",
+  journal = {CVPR}, doi = {https://doi.org/10.1109/CVPR.2016.90}, year = {2016}
+)
+@misc{scholkopf, title = {Sch{\"o}lkopf's \emph{Kernel} Methods},
+  author = {Bernhard Sch{\"o}lkopf}, url = {https://arxiv.org/abs/2101.00001}}
+"""
+
+CSL = [
+    {"type": "article-journal", "title": "BERT: Pre-training of Deep Bidirectional Transformers",
+     "author": [{"given": "Jacob", "family": "Devlin"}, {"literal": "Google AI"}],
+     "issued": {"date-parts": [[2019, 6]]}, "DOI": "10.18653/v1/N19-1423",
+     "container-title": "NAACL"},
+    {"type": "paper-conference", "title": "Denoising Diffusion Probabilistic Models",
+     "DOI": "10.48550/arXiv.2006.11239", "issued": {"date-parts": [[2020]]}},
+    {"type": "article", "title": ""},
+]
+
+
+def test_parse_bibtex_handles_braces_quotes_and_concatenation():
+    entries = lb.parse_bibtex(BIB)
+    assert [t for t, _ in entries] == ["inproceedings", "article", "misc"]
+    fields = entries[0][1]
+    assert fields["title"] == "Attention Is {All} You Need"
+    assert fields["booktitle"] == "Advances in Neural Information Processing Systems"
+    assert fields["year"] == "2017"
+
+
+def test_entries_from_bibtex():
+    att, res, sch = lb.entries_from_bibtex(BIB)
+    assert att["title"] == "Attention Is All You Need"
+    assert att["authors"][0] == "Ashish Vaswani"
+    assert (att["arxiv"], att["year"], att["type"]) == ("1706.03762", "2017", "inproceedings")
+    assert res["doi"] == "10.1109/CVPR.2016.90" and res["authors"] == ["Kaiming He",
+                                                                        "Xiangyu Zhang"]
+    assert sch["title"] == "Scholkopf's Kernel Methods" and sch["arxiv"] == "2101.00001"
+    assert all(e["resolved"] and e["source"] == "bibtex" for e in (att, res, sch))
+
+
+def test_entries_from_csl():
+    bert, ddpm = lb.entries_from_csl({"items": CSL})
+    assert bert["authors"] == ["Jacob Devlin", "Google AI"]
+    assert (bert["year"], bert["venue"], bert["doi"]) == ("2019", "NAACL", "10.18653/v1/N19-1423")
+    assert ddpm["arxiv"] == "2006.11239" and ddpm["type"] == "inproceedings"
+
+
+def _zotero(path):
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE itemTypes (itemTypeID INTEGER PRIMARY KEY, typeName TEXT);
+        CREATE TABLE items (itemID INTEGER PRIMARY KEY, itemTypeID INT);
+        CREATE TABLE fields (fieldID INTEGER PRIMARY KEY, fieldName TEXT);
+        CREATE TABLE itemDataValues (valueID INTEGER PRIMARY KEY, value);
+        CREATE TABLE itemData (itemID INT, fieldID INT, valueID INT);
+        CREATE TABLE deletedItems (itemID INTEGER PRIMARY KEY);
+        CREATE TABLE creators (creatorID INTEGER PRIMARY KEY, firstName TEXT, lastName TEXT);
+        CREATE TABLE creatorTypes (creatorTypeID INTEGER PRIMARY KEY, creatorType TEXT);
+        CREATE TABLE itemCreators (itemID INT, creatorID INT, creatorTypeID INT, orderIndex INT);
+        INSERT INTO itemTypes VALUES (1, 'conferencePaper'), (2, 'attachment');
+        INSERT INTO fields VALUES (1, 'title'), (2, 'date'), (3, 'DOI'), (4, 'url');
+        INSERT INTO items VALUES (10, 1), (11, 1), (12, 2);
+        INSERT INTO itemDataValues VALUES (1, 'Attention Is All You Need'), (2, '2017-12-04'),
+            (3, 'https://arxiv.org/abs/1706.03762'), (4, 'Trashed Paper'),
+            (5, 'Full Text PDF');
+        INSERT INTO itemData VALUES (10, 1, 1), (10, 2, 2), (10, 4, 3), (11, 1, 4), (12, 1, 5);
+        INSERT INTO deletedItems VALUES (11);
+        INSERT INTO creators VALUES (1, 'Ashish', 'Vaswani'), (2, 'Noam', 'Shazeer'),
+            (3, 'Some', 'Editor');
+        INSERT INTO creatorTypes VALUES (1, 'author'), (2, 'editor');
+        INSERT INTO itemCreators VALUES (10, 2, 1, 1), (10, 1, 1, 0), (10, 3, 2, 2);
+    """)
+    db.commit()
+    db.close()
+
+
+def test_entries_from_zotero_skips_deleted_items_and_attachments(tmp_path):
+    path = str(tmp_path / "zotero.sqlite")
+    _zotero(path)
+    (e,) = lb.load_entries(path)
+    assert e["title"] == "Attention Is All You Need"
+    assert e["authors"] == ["Ashish Vaswani", "Noam Shazeer"]
+    assert (e["year"], e["arxiv"], e["type"]) == ("2017", "1706.03762", "inproceedings")
+
+
+def test_running_zotero_lock_is_read_from_a_copy(tmp_path):
+    path = str(tmp_path / "zotero.sqlite")
+    _zotero(path)
+    zotero = sqlite3.connect(path)                 # what a running Zotero does
+    zotero.execute("PRAGMA locking_mode=EXCLUSIVE")
+    zotero.execute("UPDATE items SET itemTypeID = 1 WHERE itemID = 10")
+    zotero.commit()
+    try:
+        (e,) = lb.load_entries(path)
+    finally:
+        zotero.close()
+    assert e["title"] == "Attention Is All You Need"
+
+
+def test_lookup_by_identifier_and_title():
+    index = lb.LocalBib(lb.entries_from_bibtex(BIB) + lb.entries_from_csl(CSL))
+    assert index.lookup("arxiv", "1706.03762")["key"] == "vaswani2017"
+    assert index.lookup("doi", "10.1109/cvpr.2016.90")["key"] == "he2016"
+    ddpm = index.lookup("arxiv", "2006.11239")
+    assert ddpm["title"] == "Denoising Diffusion Probabilistic Models"
+    assert index.lookup("title", "attention is all you need")["key"] == "vaswani2017"
+    assert index.lookup("title", "Deep Residual Learning for Image Recognition.")["key"] == "he2016"
+    assert index.lookup("doi", "10.1000/missing") is None
+
+
+def test_title_lookup_goes_through_title_match():
+    index = lb.LocalBib(lb.entries_from_bibtex(BIB))
+    assert index.lookup("title", "Is Attention All You Need?") is None   # same words, reordered
+    assert index.lookup("title", "Residual Learning") is None
+
+
+def test_skipping_common_trigrams_finds_the_same_entries(monkeypatch):
+    words = ["learning", "network", "deep", "model", "graph", "neural", "vision", "the"]
+    entries = [fb.make_entry(" ".join(words[(i + k) % 8] for k in range(i % 5 + 3)) + f" {i}",
+                             [], None, None, None, None, "bibtex") for i in range(300)]
+    index = lb.LocalBib(entries)
+    queries = [e["title"] + "s" for e in entries[::7]] + ["Graph Neural Network 999"]
+    monkeypatch.setattr(lb.LocalBib, "COMMON_MIN", 0)
+    skipping = [index.find_title(q) for q in queries]
+    monkeypatch.setattr(lb.LocalBib, "COMMON_MIN", 10 ** 9)
+    assert skipping == [index.find_title(q) for q in queries]
+    assert sum(e is not None for e in skipping) == len(queries) - 1
+
+
+def test_query_of_only_common_trigrams_still_scores_every_candidate(monkeypatch):
+    titles = ([f"Deep Learning Network {k}" for k in range(40)]
+              + [f"Neural Networks {k}" for k in range(20)] + ["Deep Learning Network"])
+    index = lb.LocalBib([fb.make_entry(t, [], None, None, None, None, "bibtex")
+                         for t in titles])
+    monkeypatch.setattr(lb.LocalBib, "COMMON_MIN", 0)
+    # every trigram of the query is common; the match lacks the rarest one ("rks")
+    assert index.find_title("Deep Learning Networks")["title"] == "Deep Learning Network"
+
+
+def test_index_is_saved_and_reused_until_the_library_changes(tmp_path, monkeypatch):
+    bib = tmp_path / "refs.bib"
+    bib.write_text(BIB, encoding="utf-8")
+    index_path = str(tmp_path / "index.json")
+    first = lb.LocalBib.load([str(bib)], index_path)
+    assert json.load(open(index_path))["version"] == lb.INDEX_VERSION
+
+    calls = []
+    monkeypatch.setattr(lb, "load_entries", lambda p: calls.append(p) or [])
+    monkeypatch.setattr(lb, "trigrams", lambda n: calls.append(n) or set())
+    again = lb.LocalBib.load([str(bib)], index_path)
+    assert calls == [] and again.entries == first.entries    # tables loaded, not rebuilt
+    assert (again.titles, again.ntri, again.postings) == (first.titles, first.ntri,
+                                                           first.postings)
+    monkeypatch.undo()
+    monkeypatch.setattr(lb, "load_entries", lambda p: calls.append(p) or [])
+    assert again.lookup("title", "Attention Is All You Need")["key"] == "vaswani2017"
+
+    bib.write_text(BIB + "\n@misc{new, title={Another Paper}}\n", encoding="utf-8")
+    lb.LocalBib.load([str(bib)], index_path)
+    assert calls == [str(bib)]
+
+
+def test_resolve_uses_local_tier_before_network(monkeypatch):
+    def boom(*a, **k):
+        raise AssertionError("network used")
+
+    for name in ("fetch_arxiv", "fetch_crossref_by_doi", "fetch_crossref_by_title",
+                 "fetch_arxiv_batch", "fetch_crossref_by_dois"):
+        monkeypatch.setattr(fb, name, boom)
+    index = lb.LocalBib(lb.entries_from_bibtex(BIB))
+    assert fb.resolve("arXiv:1706.03762v5", local=index)["key"] == "vaswani2017"
+    got = fb.resolve_all(["10.1109/CVPR.2016.90", "Attention is all you need", "1706.03762"],
+                         local=index)
+    assert [e["key"] for e in got] == ["he2016", "vaswani2017", "vaswani2017"]
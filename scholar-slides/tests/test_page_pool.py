@@ -0,0 +1,97 @@
+"""Tests for the page-range splitter behind the `--workers N` page-parallel mode, and for
+parity of the parallel ingest/detect passes with the serial walk."""
+import pytest
+
+import page_pool as pp
+
+
+class TestPageRanges:
+    def test_covers_every_page_in_order(self):
+        ranges = pp.page_ranges(10, 3)
+        assert ranges == [(0, 4), (4, 7), (7, 10)]
+        assert [i for a, b in ranges for i in range(a, b)] == list(range(10))
+
+    def test_more_workers_than_pages(self):
+        assert pp.page_ranges(3, 32) == [(0, 1), (1, 2), (2, 3)]
+
+    def test_single_chunk(self):
+        assert pp.page_ranges(5, 1) == [(0, 5)]
+
+    def test_empty_document(self):
+        assert pp.page_ranges(0, 4) == []
+        assert pp.map_page_ranges(None, "unused.pdf", 0, 4) == []
+
+
+class TestOpenDoc:
+    def test_path_is_opened_and_closed(self, tmp_path):
+        import fitz
+
+        path = str(tmp_path / "one.pdf")
+        doc = fitz.open()
+        doc.new_page()
+        doc.save(path)
+        doc.close()
+        with pp.open_doc(path) as d:
+            assert d.page_count == 1 and d.name == path
+        assert d.is_closed
+
+    def test_open_document_is_shared_not_closed(self):
+        import fitz
+
+        doc = fitz.open()
+        doc.new_page()
+        with pp.open_doc(doc) as d:
+            assert d is doc
+        assert not doc.is_closed
+        doc.close()
+
+    def test_workers_and_cache_reject_a_memory_document(self, tmp_path):
+        import fitz
+
+        import crop_cache
+        import crop_figure
+        import detect_figures
+
+        doc = fitz.open()
+        doc.new_page()
+        doc.new_page()
+        with pytest.raises(ValueError, match="opened from memory"):
+            pp.doc_path(doc, "workers > 1")
+        with pytest.raises(ValueError, match="workers > 1"):
+            detect_figures.detect(doc, workers=2)
+        rec = {"id": "figure-1", "page": 1, "figure_bbox": [10, 10, 100, 100]}
+        with pytest.raises(ValueError, match="crop cache"):
+            crop_figure.crop_from_inventory(doc, [rec], str(tmp_path / "out"),
+                                            cache=crop_cache.CropCache(str(tmp_path / "c")))
+
+        path = str(tmp_path / "one.pdf")
+        doc.save(path)
+        saved = fitz.open(path)
+        assert pp.doc_path(saved, "workers > 1") == path
+        saved.new_page()
+        with pytest.raises(ValueError, match="unsaved changes"):
+            pp.doc_path(saved, "workers > 1")
+
+
+class TestWorkerParity:
+    @pytest.mark.parametrize("workers", [2, 3])
+    def test_extract_matches_serial(self, tmp_path, multi_page_pdf, workers):
+        import ingest_pdf
+
+        pdf = str(tmp_path / "paper.pdf")
+        multi_page_pdf(pdf)
+        assert ingest_pdf.extract(pdf, workers=workers) == ingest_pdf.extract(pdf)
+
+    @pytest.mark.parametrize("workers", [2, 3])
+    def test_detect_matches_serial_across_range_boundaries(self, tmp_path, multi_page_pdf,
+                                                           workers):
+        import detect_figures
+
+        pdf = str(tmp_path / "paper.pdf")
+        multi_page_pdf(pdf)
+        serial = detect_figures.detect(pdf)
+        # the repeated "Figure 2" caption on page 5 lands in a different range from page 3
+        assert [(f["id"], f["page"]) for f in serial] == [
+            ("figure-1", 1), ("figure-2", 3), ("table-1", 3), ("figure-3", 6)]
+        assert all(f["figure_bbox"] for f in serial)
+        assert detect_figures.detect(pdf, workers=workers) == serial
@@ -0,0 +1,162 @@
+"""Tests for the arXiv PDF mirror: streaming + resumable download against a local HTTP stand-in."""
+import http.server
+import os
+import threading
+import time
+
+import pytest
+
+import pdf_mirror as pm
+import prepare_source as ps
+
+BODY = b"%PDF-1.4\n" + bytes(range(256)) * 1000 + b"\n%%EOF\n"
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.seen.append((self.path, self.headers.get("Range")))
+        self.server.if_range.append(self.headers.get("If-Range"))
+        body = self.server.body
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range") in (None, self.server.etag):
+            start = int(rng.split("=")[1].rstrip("-"))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header("ETag", self.server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.server.gate.wait(5)
+        cut = self.server.cut
+        if cut is not None:          # drop the connection mid-body, once
+            self.server.cut = None
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.daemon_threads = True
+    srv.seen = []
+    srv.if_range = []
+    srv.body = BODY
+    srv.etag = '"v1"'
+    srv.cut = None
+    srv.gate = threading.Event()
+    srv.gate.set()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    srv.base = f"http://127.0.0.1:{srv.server_address[1]}/pdf/"
+    yield srv
+    srv.gate.set()
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_mirror_name_keeps_version():
+    assert pm.mirror_name("1706.03762") == "1706.03762.pdf"
+    assert pm.mirror_name("1706.03762", "v5") == "1706.03762v5.pdf"
+
+
+def test_fetch_streams_into_mirror_then_serves_offline(server, tmp_path):
+    mirror = str(tmp_path / "mirror")
+    got = pm.fetch_arxiv("1706.03762", "v5", str(tmp_path / "a"), mirror_dir=mirror,
+                         base_url=server.base)
+    assert open(got, "rb").read() == BODY
+    assert server.seen == [("/pdf/1706.03762v5", None)]
+    assert os.path.exists(os.path.join(mirror, "1706.03762v5.pdf"))
+    assert not os.path.exists(os.path.join(mirror, "1706.03762v5.pdf.part"))
+    # A second bundle (any work dir) is served from the mirror: no request at all.
+    again = pm.fetch_arxiv("1706.03762", "v5", str(tmp_path / "b"), mirror_dir=mirror,
+                           base_url=server.base)
+    assert open(again, "rb").read() == BODY
+    assert len(server.seen) == 1
+
+
+def test_partial_download_resumes_with_range(server, tmp_path):
+    dest = str(tmp_path / "x.pdf")
+    server.cut = 100000
+    with pytest.raises(OSError):
+        pm.download(server.base + "x", dest, chunk=1000)
+    have = os.path.getsize(dest + ".part")
+    assert not os.path.exists(dest) and 0 < have <= 100000
+    pm.download(server.base + "x", dest)
+    assert open(dest, "rb").read() == BODY
+    assert server.seen[1] == ("/pdf/x", f"bytes={have}-") and server.if_range[1] == '"v1"'
+    assert os.listdir(str(tmp_path)) == ["x.pdf"]
+
+
+def test_changed_file_restarts_instead_of_appending(server, tmp_path):
+    dest = str(tmp_path / "x.pdf")
+    server.cut = 100000
+    with pytest.raises(OSError):
+        pm.download(server.base + "x", dest, chunk=1000)
+    server.etag = '"v2"'                        # new revision: If-Range fails, full 200
+    server.body = b"%PDF-1.5\n" + b"new" * 500
+    pm.download(server.base + "x", dest)
+    assert open(dest, "rb").read() == server.body
+
+
+def test_part_without_validator_is_not_resumed(server, tmp_path):
+    dest = str(tmp_path / "x.pdf")
+    with open(dest + ".part", "wb") as fh:
+        fh.write(b"junk from an unknown source")
+    pm.download(server.base + "x", dest)
+    assert open(dest, "rb").read() == BODY
+    assert server.seen == [("/pdf/x", None)]
+
+
+def test_concurrent_fetches_share_one_download(server, tmp_path):
+    mirror = str(tmp_path / "mirror")
+    server.gate.clear()                         # hold the first response until both started
+    got = []
+
+    def fetch(work):
+        got.append(pm.fetch_arxiv("1706.03762", "v5", str(tmp_path / work), mirror_dir=mirror,
+                                  base_url=server.base))
+
+    first = threading.Thread(target=fetch, args=("a",))
+    first.start()
+    while not server.seen:
+        time.sleep(0.01)
+    second = threading.Thread(target=fetch, args=("b",))
+    second.start()
+    time.sleep(0.3)                             # the second fetch is now waiting on the lock
+    server.gate.set()
+    first.join(10)
+    second.join(10)
+    assert len(got) == 2 and all(open(p, "rb").read() == BODY for p in got)
+    assert len(server.seen) == 1
+    assert sorted(os.listdir(mirror)) == ["1706.03762v5.pdf"]
+
+
+def test_stale_lock_is_taken_over(server, tmp_path, monkeypatch):
+    dest = str(tmp_path / "x.pdf")
+    open(dest + ".lock", "w").close()
+    old = time.time() - 2 * pm.STALE_LOCK_S
+    os.utime(dest + ".lock", (old, old))
+    pm.download(server.base + "x", dest)
+    assert open(dest, "rb").read() == BODY and not os.path.exists(dest + ".lock")
+
+
+def test_non_pdf_body_is_rejected_and_not_cached(server, tmp_path):
+    server.body = b"<html>PDF is being generated</html>"
+    dest = str(tmp_path / "x.pdf")
+    with pytest.raises(ValueError):
+        pm.download(server.base + "x", dest)
+    assert not os.path.exists(dest) and not os.path.exists(dest + ".part")
+
+
+def test_resolve_input_parses_versioned_url(server, tmp_path):
+    got = ps.resolve_input("https://arxiv.org/abs/1706.03762v7", str(tmp_path / "w"),
+                           mirror_dir=str(tmp_path / "m"), base_url=server.base)
+    assert os.path.basename(got) == "1706.03762v7.pdf"
+    assert server.seen[0][0] == "/pdf/1706.03762v7"
@@ -0,0 +1,39 @@
+"""Tests for batch Stage-1 preparation: bundle planning, list parsing, failure isolation."""
+import json
+import os
+
+import prepare_batch as pb
+
+
+def test_read_sources_skips_blanks_comments_and_repeats(tmp_path):
+    lst = tmp_path / "papers.txt"
+    lst.write_text("# week 12\n1706.03762\n\n/data/a.pdf  # local copy\n1706.03762\n",
+                   encoding="utf-8")
+    assert pb.read_sources(str(lst)) == ["1706.03762", "/data/a.pdf"]
+
+
+def test_plan_bundles_disambiguates_colliding_stems():
+    dirs = pb.plan_bundles(["x/paper.pdf", "y/paper.pdf", "1706.03762"], "out")
+    assert dirs == [os.path.join("out", "paper"), os.path.join("out", "paper_2"),
+                    os.path.join("out", "1706_03762")]
+
+
+def test_failed_source_does_not_abort_batch(tmp_path, vector_figure_pdf):
+    a, b = str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")
+    vector_figure_pdf(a)
+    vector_figure_pdf(b)
+    missing = str(tmp_path / "missing.pdf")
+    root = str(tmp_path / "out")
+    batch = pb.prepare_batch([a, missing, b], root, download_workers=2, prepare_workers=2,
+                             dpi=72, use_cache=False)
+    assert [e["status"] for e in batch["sources"]] == ["ok", "error", "ok"]
+    assert (batch["n_ok"], batch["n_failed"]) == (2, 1)
+    bad = batch["sources"][1]
+    assert bad["step"] == "fetch" and "FileNotFoundError" in bad["error"]
+    for e in (batch["sources"][0], batch["sources"][2]):
+        assert e["n_figures"] == 1 and e["timings"]["prepare_s"] >= 0
+        assert set(e["profile"]) == {"download", "ingest", "detect", "crop"}
+        assert set(e["profile"]["detect"]["phases"]) == {"text_s", "drawings_s", "regions_s"}
+        assert os.path.exists(os.path.join(e["out_dir"], "manifest.json"))
+    with open(os.path.join(root, pb.BATCH_FILE), encoding="utf-8") as fh:
+        assert json.load(fh) == batch
@@ -0,0 +1,158 @@
+"""Tests for the Stage-1 orchestrator: stage wiring, the shared PDF handle and the optional
+bibliography prefetch stage."""
+import json
+import os
+
+import fetch_bib as fb
+import prepare_source as ps
+
+
+def _paper_pdf(path):
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=791)
+    page.insert_text((60, 80), "A Paper\n\nReferences\n"
+                     "[1] A. Vaswani. Attention. arXiv:1706.03762, 2017.\n"
+                     "[2] K. He. ResNet. doi:10.1109/CVPR.2016.90.\n"
+                     "[3] Gone. doi:10.1000/missing.", fontsize=9)
+    doc.save(path)
+
+
+def test_prefetch_bib_resolves_cited_ids_in_one_batched_pass(tmp_path, monkeypatch):
+    calls = []
+
+    def arxiv_batch(ids):
+        calls.append(("arxiv", list(ids)))
+        return {"1706.03762": {"key": "vaswani2017", "resolved": True}}
+
+    def crossref_batch(dois):
+        calls.append(("doi", list(dois)))
+        return {"10.1109/cvpr.2016.90": {"key": "he2016", "resolved": True}}
+
+    monkeypatch.setattr(fb, "fetch_arxiv_batch", arxiv_batch)
+    monkeypatch.setattr(fb, "fetch_crossref_by_dois", crossref_batch)
+    pdf = str(tmp_path / "paper.pdf")
+    _paper_pdf(pdf)
+    out = str(tmp_path / "out")
+    cache = str(tmp_path / "bib.sqlite3")
+
+    m = ps.prepare(pdf, out_dir=out, dpi=72, use_cache=False, prefetch_bib=True,
+                   bib_cache_path=cache)
+    assert calls == [("arxiv", ["1706.03762"]),
+                     ("doi", ["10.1109/cvpr.2016.90", "10.1000/missing"])]
+    assert m["bib"] == {"n_cited": 3, "n_resolved": 2, "n_errors": 0}
+    with open(os.path.join(out, "bib.json"), encoding="utf-8") as fh:
+        bib = json.load(fh)
+    assert [e.get("key") for e in bib] == ["vaswani2017", "he2016", None]
+    assert "bib" in m["profile"]
+
+    report = []
+    ps.prepare(pdf, out_dir=out, dpi=72, use_cache=False, prefetch_bib=True,
+               bib_cache_path=cache, report=report)
+    assert dict(report)["bib"] == "fresh" and len(calls) == 2
+
+
+def test_failed_prefetch_is_retried_next_run(tmp_path, monkeypatch):
+    def offline(ids):
+        raise ConnectionError("offline")
+
+    monkeypatch.setattr(fb, "fetch_arxiv_batch", offline)
+    monkeypatch.setattr(fb, "fetch_crossref_by_dois", offline)
+    pdf = str(tmp_path / "paper.pdf")
+    _paper_pdf(pdf)
+    out = str(tmp_path / "out")
+    opts = dict(out_dir=out, dpi=72, use_cache=False, prefetch_bib=True,
+                bib_cache_path=str(tmp_path / "bib.sqlite3"))
+    assert ps.prepare(pdf, **opts)["bib"]["n_errors"] == 3
+
+    monkeypatch.setattr(fb, "fetch_arxiv_batch", lambda ids: {})
+    monkeypatch.setattr(fb, "fetch_crossref_by_dois", lambda dois: {})
+    report = []
+    assert ps.prepare(pdf, report=report, **opts)["bib"]["n_errors"] == 0
+    assert dict(report)["bib"] == "built"
+
+
+def test_no_bib_stage_by_default(tmp_path):
+    pdf = str(tmp_path / "paper.pdf")
+    _paper_pdf(pdf)
+    report = []
+    m = ps.prepare(pdf, out_dir=str(tmp_path / "out"), dpi=72, use_cache=False, report=report)
+    assert "bib" not in m and "bib" not in dict(report)
+    assert not os.path.exists(str(tmp_path / "out" / "bib.json"))
+
+
+def _outputs(out):
+    """{relative path: mtime_ns} of every bundle artifact (the stage state file excluded)."""
+    found = {}
+    for root, dirs, files in os.walk(out):
+        dirs[:] = [d for d in dirs if d != ".cache"]
+        for name in files:
+            if name != "stages.json":
+                path = os.path.join(root, name)
+                found[os.path.relpath(path, out)] = os.stat(path).st_mtime_ns
+    return found
+
+
+def _counting_open(monkeypatch):
+    import fitz
+
+    opened = []
+    real = fitz.open
+
+    def counted(*a, **k):
+        opened.append(a)
+        return real(*a, **k)
+
+    monkeypatch.setattr(fitz, "open", counted)
+    return opened
+
+
+def test_pdf_is_opened_once_cold_and_never_when_fresh(tmp_path, monkeypatch, vector_figure_pdf):
+    pdf = str(tmp_path / "paper.pdf")
+    vector_figure_pdf(pdf)
+    out = str(tmp_path / "out")
+    opened = _counting_open(monkeypatch)
+    m = ps.prepare(pdf, out_dir=out, dpi=72, use_cache=False)
+    assert [c["status"] for c in m["crops"]] == ["ok"]
+    assert len(opened) == 1
+    del opened[:]
+    ps.prepare(pdf, out_dir=out, dpi=72, use_cache=False)
+    assert opened == []
+
+
+def test_unchanged_rerun_is_fresh_and_writes_nothing(tmp_path, vector_figure_pdf):
+    pdf = str(tmp_path / "paper.pdf")
+    vector_figure_pdf(pdf)
+    out = str(tmp_path / "out")
+    report = []
+    ps.prepare(pdf, out_dir=out, dpi=72, report=report)
+    assert dict(report) == dict.fromkeys(("ingest", "detect", "crop", "manifest"), "built")
+    before = _outputs(out)
+    assert "manifest.json" in before and any(p.startswith("figures" + os.sep) for p in before)
+
+    report = []
+    ps.prepare(pdf, out_dir=out, dpi=72, report=report)
+    assert dict(report) == dict.fromkeys(("ingest", "detect", "crop", "manifest"), "fresh")
+    assert _outputs(out) == before
+
+
+def test_dpi_change_reruns_only_crop_and_manifest(tmp_path, vector_figure_pdf):
+    pdf = str(tmp_path / "paper.pdf")
+    vector_figure_pdf(pdf)
+    out = str(tmp_path / "out")
+    import fitz
+
+    crop = ps.prepare(pdf, out_dir=out, dpi=72)["crops"][0]["path"]
+    width = fitz.Pixmap(crop).width
+    before = _outputs(out)
+
+    report = []
+    ps.prepare(pdf, out_dir=out, dpi=144, report=report)
+    assert dict(report) == {"ingest": "fresh", "detect": "fresh", "crop": "built",
+                            "manifest": "built"}
+    after = _outputs(out)
+    for name in ("ingest.json", "figures.json"):
+        assert after[name] == before[name]
+    assert after["manifest.json"] != before["manifest.json"]
+    assert abs(fitz.Pixmap(crop).width - 2 * width) <= 4     # re-rendered at 2x the dpi
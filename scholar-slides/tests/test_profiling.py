@@ -0,0 +1,77 @@
+"""Tests for per-stage wall/CPU/RSS accounting and the detect phase split."""
+import detect_figures as df
+import profiling
+
+
+def test_measure_records_wall_cpu_and_rss():
+    profile = {}
+    with profiling.measure(profile, "busy") as rec:
+        sum(i * i for i in range(200000))
+        rec["phases"] = {"inner_s": 0.0}
+    got = profile["busy"]
+    assert got["wall_s"] >= 0 and got["cpu_s"] >= 0
+    assert got["peak_rss_mb"] is None or got["peak_rss_mb"] > 0
+    assert got["rss_growth_mb"] is None or 0 <= got["rss_growth_mb"] <= got["peak_rss_mb"]
+    assert got["phases"] == {"inner_s": 0.0}
+    lines = profiling.format_profile(profile)
+    assert lines[0].lstrip().startswith("busy") and "inner_s" in lines[1]
+
+
+def test_measure_records_even_when_stage_raises():
+    profile = {}
+    try:
+        with profiling.measure(profile, "broken"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert "wall_s" in profile["broken"]
+
+
+def test_detect_reports_phase_times_and_drawing_paths(tmp_path, vector_figure_pdf):
+    pdf = str(tmp_path / "fig.pdf")
+    vector_figure_pdf(pdf)
+    stats = {}
+    df.detect(pdf, stats=stats)
+    assert all(stats[k] >= 0 for k in df.PHASES)
+    assert stats["drawing_paths"] >= stats["drawing_rects_raw"] > 0
+
+
+def test_drawing_paths_count_caption_less_pages_too(tmp_path, vector_figure_pdf):
+    import fitz
+
+    pdf = str(tmp_path / "fig.pdf")
+    vector_figure_pdf(pdf)
+    stats = {}
+    df.detect(pdf, stats=stats)
+    doc = fitz.open(pdf)
+    page = doc.new_page()   # no caption: skipped for localization, still counted
+    for i in range(5):
+        page.draw_rect(fitz.Rect(50, 50 + 20 * i, 150, 60 + 20 * i), color=(0, 0, 0))
+    more = {}
+    df.detect(doc, stats=more)
+    assert more["pages_skipped"] == 1
+    assert more["drawing_paths"] == stats["drawing_paths"] + 5
+    doc.close()
+
+
+def test_caption_less_pages_are_not_listed_without_stats(tmp_path, vector_figure_pdf,
+                                                         monkeypatch):
+    import fitz
+
+    pdf = str(tmp_path / "fig.pdf")
+    vector_figure_pdf(pdf)
+    doc = fitz.open(pdf)
+    doc.new_page().draw_rect(fitz.Rect(50, 50, 150, 60), color=(0, 0, 0))
+    calls = []
+    listing = fitz.Page.get_cdrawings
+
+    def counted(self, *a, **k):
+        calls.append(self.number)
+        return listing(self, *a, **k)
+
+    monkeypatch.setattr(fitz.Page, "get_cdrawings", counted)
+    assert [f["id"] for f in df.detect(doc)] == ["figure-1"]
+    assert 1 not in calls           # the caption-less page is never listed
+    df.detect(doc, stats={})
+    assert 1 in calls
+    doc.close()
@@ -0,0 +1,82 @@
+"""Unit tests for the incremental Stage-1 build graph (freshness, params, force)."""
+import os
+
+import stage_graph as sg
+
+
+def make_stage(out_dir, calls, content="v1"):
+    path = os.path.join(out_dir, "a.json")
+
+    def build():
+        calls.append("a")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(content)
+        return [path], {"n": len(calls)}
+
+    return path, build
+
+
+def test_second_run_with_same_inputs_is_fresh(tmp_path):
+    calls = []
+    _, build = make_stage(str(tmp_path), calls)
+    g = sg.StageGraph(str(tmp_path))
+    rec = g.run("a", {"pdf": "h1"}, {"dpi": 200}, build)
+    assert rec["outputs"] == {"a.json": g.digest(str(tmp_path / "a.json"))}
+    g2 = sg.StageGraph(str(tmp_path))          # fresh process: state comes from stages.json
+    rec2 = g2.run("a", {"pdf": "h1"}, {"dpi": 200}, build)
+    assert calls == ["a"] and g2.report == [("a", "fresh")]
+    assert rec2["extra"] == {"n": 1}           # downstream still sees the recorded extra
+
+
+def test_changed_input_or_param_rebuilds(tmp_path):
+    calls = []
+    _, build = make_stage(str(tmp_path), calls)
+    sg.StageGraph(str(tmp_path)).run("a", {"pdf": "h1"}, {"dpi": 200}, build)
+    sg.StageGraph(str(tmp_path)).run("a", {"pdf": "h2"}, {"dpi": 200}, build)
+    sg.StageGraph(str(tmp_path)).run("a", {"pdf": "h2"}, {"dpi": 300}, build)
+    assert calls == ["a", "a", "a"]
+
+
+def test_edited_or_missing_artifact_rebuilds(tmp_path):
+    calls = []
+    path, build = make_stage(str(tmp_path), calls)
+    sg.StageGraph(str(tmp_path)).run("a", {}, {}, build)
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("hand-edited!")
+    sg.StageGraph(str(tmp_path)).run("a", {}, {}, build)
+    os.remove(path)
+    sg.StageGraph(str(tmp_path)).run("a", {}, {}, build)
+    assert calls == ["a", "a", "a"]
+
+
+def test_force_overrides_freshness(tmp_path):
+    calls = []
+    _, build = make_stage(str(tmp_path), calls)
+    sg.StageGraph(str(tmp_path)).run("a", {}, {}, build)
+    g = sg.StageGraph(str(tmp_path), force=["a"])
+    g.run("a", {}, {}, build)
+    sg.StageGraph(str(tmp_path), force=["all"]).run("a", {}, {}, build)
+    sg.StageGraph(str(tmp_path), force=["b"]).run("a", {}, {}, build)
+    assert calls == ["a", "a", "a"] and g.report == [("a", "built")]
+
+
+def test_digest_is_content_hash(tmp_path):
+    g = sg.StageGraph(str(tmp_path))
+    p = tmp_path / "x.bin"
+    p.write_bytes(b"abc")
+    assert g.digest(str(p)) == "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+    assert g.digest(str(tmp_path / "missing")) is None
+
+
+def test_code_digest_follows_sibling_imports(tmp_path):
+    (tmp_path / "stage.py").write_text("import json\nimport helper\n", encoding="utf-8")
+    (tmp_path / "helper.py").write_text("def f():\n    from deep import g\n", encoding="utf-8")
+    (tmp_path / "deep.py").write_text("g = 1\n", encoding="utf-8")
+    (tmp_path / "other.py").write_text("x = 1\n", encoding="utf-8")
+    stage = str(tmp_path / "stage.py")
+    g = sg.StageGraph(str(tmp_path))
+    first = g.code_digest(stage)
+    (tmp_path / "other.py").write_text("x = 2\n", encoding="utf-8")
+    assert sg.StageGraph(str(tmp_path)).code_digest(stage) == first
+    (tmp_path / "deep.py").write_text("g = 2\n", encoding="utf-8")
+    assert sg.StageGraph(str(tmp_path)).code_digest(stage) != first